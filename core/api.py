@@ -0,0 +1,110 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.decorators import method_decorator
+from django.utils.http import http_date
+from django.views.decorators.gzip import gzip_page
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.views import APIView
+
+from .models import AttendanceResult
+from .results import get_result, load_frame, result_digest
+
+# Read-only JSON API over the stored monthly results, for dashboards that
+# poll the numbers. Responses carry an ETag/Last-Modified derived from the
+# stored result, so an unchanged month costs a 304 and no file read, and
+# are gzipped for clients that accept it.
+REPORTS = {
+    "staff-totals": "totals",
+    "daily-summary": "daily",
+}
+
+
+def field_name(column):
+    """JSON key of a report column, e.g. "Resume Count" -> "resume_count"."""
+    return column.strip().lower().replace(" ", "_")
+
+
+class ReportPagination(PageNumberPagination):
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+
+def _validators(result, request):
+    # The representation depends on the stored content and on the query (fields, page)
+    etag = hashlib.sha256(f"{result_digest(result)}?{request.GET.urlencode()}".encode()).hexdigest()[:32]
+    return f'"{etag}"', int(result.updated_at.timestamp())
+
+
+def _set_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    # Clients may keep the copy but must revalidate it on every poll
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@method_decorator(gzip_page, name="dispatch")
+class MonthListView(APIView):
+    """Months with stored results, newest first."""
+
+    def get(self, request):
+        results = AttendanceResult.objects.exclude(daily_file="").exclude(totals_file="").order_by("-month_id")
+        return Response({
+            "months": [
+                {
+                    "month_id": result.month_id,
+                    "updated_at": result.updated_at,
+                    "staff": (result.report_data or {}).get("staff"),
+                    "reports": {
+                        name: reverse("api_report", args=[result.month_id, name], request=request)
+                        for name in REPORTS
+                    },
+                }
+                for result in results
+            ],
+        })
+
+
+@method_decorator(gzip_page, name="dispatch")
+class ReportView(APIView):
+    """
+    One month's staff totals or daily summary as paginated JSON rows.
+    ?fields=staff,resume_count limits the keys of each row; ?page= and
+    ?page_size= select the page.
+    """
+    pagination_class = ReportPagination
+
+    def get(self, request, month_id, report):
+        result = get_result(month_id)
+        if result is None:
+            raise NotFound(f"No results for {month_id}.")
+
+        etag, last_modified = _validators(result, request)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return _set_validators(not_modified, etag, last_modified)
+
+        frame = load_frame(result, REPORTS[report])
+        frame.columns = [field_name(col) for col in frame.columns]
+
+        fields = [name.strip() for name in request.GET.get("fields", "").split(",") if name.strip()]
+        unknown = [name for name in fields if name not in frame.columns]
+        if unknown:
+            raise ValidationError({"fields": f"Unknown field(s) {', '.join(unknown)}; available: {', '.join(frame.columns)}."})
+        if fields:
+            frame = frame[fields]
+
+        # Paginate row positions only; the frame itself is sliced once
+        paginator = self.pagination_class()
+        positions = paginator.paginate_queryset(range(len(frame)), request, view=self)
+        rows = frame.iloc[positions[0]:positions[-1] + 1] if positions else frame.iloc[:0]
+
+        response = paginator.get_paginated_response(rows.to_dict("records"))
+        response.data["month_id"] = month_id
+        response.data["fields"] = list(frame.columns)
+        return _set_validators(response, etag, last_modified)
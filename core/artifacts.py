@@ -0,0 +1,181 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .db import retry_locked
+from .models import Artifact, UploadJob
+
+logger = logging.getLogger(__name__)
+
+# Every file the app writes besides the stored results lives under one of these
+# storage folders and is tracked as an Artifact row: XLSX exports, chart PNGs
+# and uploaded workbooks. Each has an owner (the result it was derived from,
+# the session that uploaded it) and is evicted when it has not been used for
+# ARTIFACT_MAX_AGE, when its session is gone, when its result is replaced or,
+# least recently used first, when the store outgrows ARTIFACT_MAX_BYTES.
+MANAGED_DIRS = ("artifacts", "charts", "uploads")
+SCRATCH_PREFIX = ".tmp-"
+
+_lock = threading.Lock()
+_last_sweep = 0.0
+
+
+def path(name):
+    """Filesystem path of a storage name, e.g. a folder to render into."""
+    return default_storage.path(name)
+
+
+def use(names, result=None, session_key=""):
+    """
+    Records that the files `names` were just written or served for `result` /
+    `session_key`: new ones are tracked, known ones count as recently used.
+    """
+    now = timezone.now()
+    entries = [
+        Artifact(
+            name=name, attendance=result, session_key=session_key, last_used=now,
+            size=default_storage.size(name) if default_storage.exists(name) else 0,
+        )
+        for name in names
+    ]
+    update_fields = ["size", "last_used"]
+    if result is not None:
+        update_fields.append("attendance")
+    if session_key:
+        update_fields.append("session_key")
+    # One upsert statement: no read-then-write transaction to contend on
+    retry_locked(
+        Artifact.objects.bulk_create,
+        entries, update_conflicts=True, unique_fields=["name"], update_fields=update_fields,
+    )
+    _maybe_sweep()
+
+
+@contextmanager
+def create(name, result=None, session_key=""):
+    """
+    Yields a scratch path to write the artifact `name` to. When the block
+    succeeds the file is moved into place (readers never see half a file) and
+    tracked; otherwise the scratch file is removed.
+    """
+    target = path(name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    fd, scratch = tempfile.mkstemp(prefix=SCRATCH_PREFIX, suffix=os.path.splitext(name)[1], dir=os.path.dirname(target))
+    os.close(fd)
+    try:
+        yield scratch
+        os.replace(scratch, target)
+    finally:
+        if os.path.exists(scratch):
+            os.remove(scratch)
+    use([name], result=result, session_key=session_key)
+
+
+def _delete(entries):
+    for entry in entries:
+        if default_storage.exists(entry.name):
+            default_storage.delete(entry.name)
+    Artifact.objects.filter(pk__in=[entry.pk for entry in entries]).delete()
+
+
+def release(month_id):
+    """Deletes every artifact owned by a month's result, e.g. after it was replaced."""
+    _delete(list(Artifact.objects.filter(attendance__month_id=month_id)))
+
+    # Files of that month that never got tracked (e.g. a crash mid-write)
+    folder = f"artifacts/{month_id}"
+    if default_storage.exists(folder):
+        _, files = default_storage.listdir(folder)
+        for filename in files:
+            default_storage.delete(f"{folder}/{filename}")
+
+
+def _in_use():
+    # Uploads still waiting to be parsed are never evicted, unless their job
+    # is past UPLOAD_JOB_TIMEOUT: it was lost with its process (jobs.recover_job)
+    return set(UploadJob.objects.filter(
+        status__in=[UploadJob.STATUS_QUEUED, UploadJob.STATUS_RUNNING],
+        updated_at__gte=timezone.now() - timedelta(seconds=settings.UPLOAD_JOB_TIMEOUT),
+    ).values_list("file", flat=True))
+
+
+def _untracked(oldest, busy):
+    """Storage names under MANAGED_DIRS that are not tracked and older than `oldest`."""
+    tracked = set(Artifact.objects.values_list("name", flat=True)) | busy
+    for folder in MANAGED_DIRS:
+        root = path(folder)
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                full = os.path.join(dirpath, filename)
+                name = os.path.relpath(full, settings.MEDIA_ROOT).replace(os.sep, "/")
+                try:
+                    modified = os.path.getmtime(full)
+                except OSError:
+                    continue
+                if name not in tracked and modified < oldest.timestamp():
+                    yield name
+
+
+def sweep(dry_run=False):
+    """
+    Evicts expired, ownerless and over-quota artifacts plus stray untracked
+    files. Returns {"files": count, "bytes": size} of what was (or would be) removed.
+    """
+    now = timezone.now()
+    oldest = now - timedelta(seconds=settings.ARTIFACT_MAX_AGE)
+
+    busy = _in_use()
+    live_sessions = set(Session.objects.filter(expire_date__gt=now).values_list("session_key", flat=True))
+
+    # Expired or ownerless first, then least recently used until the rest fits
+    evicted = {}
+    total = 0
+    for entry in Artifact.objects.exclude(name__in=busy).order_by("-last_used"):
+        if entry.last_used < oldest or (entry.session_key and entry.session_key not in live_sessions):
+            evicted[entry.pk] = entry
+            continue
+        total += entry.size
+        if total > settings.ARTIFACT_MAX_BYTES:
+            evicted[entry.pk] = entry
+
+    strays = list(_untracked(oldest, busy))
+    stray_bytes = sum(default_storage.size(name) for name in strays)
+    stats = {
+        "files": len(evicted) + len(strays),
+        "bytes": sum(entry.size for entry in evicted.values()) + stray_bytes,
+    }
+    if not dry_run:
+        _delete(list(evicted.values()))
+        for name in strays:
+            default_storage.delete(name)
+        logger.info("Artifacts swept", extra=stats)
+    return stats
+
+
+def _sweep_in_background():
+    try:
+        sweep()
+    except Exception:
+        logger.exception("Artifact sweep failed")
+    finally:
+        close_old_connections()
+
+
+def _maybe_sweep():
+    # Long-running servers sweep on their own, at most every ARTIFACT_SWEEP_INTERVAL
+    global _last_sweep
+    with _lock:
+        if time.monotonic() - _last_sweep < settings.ARTIFACT_SWEEP_INTERVAL:
+            return
+        _last_sweep = time.monotonic()
+    threading.Thread(target=_sweep_in_background, name="artifact-sweep", daemon=True).start()
@@ -0,0 +1,97 @@
+import io
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from . import artifacts, metrics
+from .jobs import discard_process_pool, process_pool
+from .results import load_rollups, result_digest
+
+# Charts are rendered once per result content into MEDIA_ROOT/charts, named by
+# the result's digest, so identical results share files and concurrent users
+# never overwrite each other's charts. Rendering runs in the worker processes;
+# the files are tracked in the artifact store once they are served.
+CHARTS_DIR = "charts"
+CHART_FILES = {
+    "daily_percent_path": "daily_percent.png",
+    "staff_performance_path": "staff_performance.png",
+    "absentee_heatmap_path": "absentee_heatmap.png",
+}
+# A failed rendering is reported for this long, then tried again
+RETRY_AFTER = 60  # seconds
+
+_lock = threading.RLock()
+_pending = {}
+_failed = {}  # key -> (error, time.monotonic() of the failure)
+
+
+def render_charts(rollups_bytes, key):
+    """Runs in a worker process: draws the three charts for one result, returns stage samples."""
+    from .code import visualize_attendance
+    from .rollups import Rollups
+
+    samples = []
+    with metrics.stage("plotting", samples):
+        visualize_attendance(
+            Rollups.from_file(io.BytesIO(rollups_bytes)),
+            output_dir=artifacts.path(CHARTS_DIR),
+            prefix=f"{key}_",
+        )
+    return samples
+
+
+def _finished(key, pool, future):
+    with _lock:
+        _pending.pop(key, None)
+        error = future.exception()
+        if error is None:
+            metrics.observe_samples(future.result())
+            return
+        metrics.count_error("plotting")
+        if isinstance(error, BrokenProcessPool):
+            # Not this result's fault: the next request renders on a fresh pool
+            discard_process_pool(pool)
+        else:
+            _failed[key] = (str(error), time.monotonic())
+
+
+def get_charts(result):
+    """
+    Returns {chart name: media URL} once a result's charts exist. Otherwise
+    queues their rendering (at most once per result) and returns None.
+    Raises RuntimeError if rendering this result failed in the last RETRY_AFTER seconds.
+    """
+    key = result_digest(result)
+
+    urls = {}
+    for name, filename in CHART_FILES.items():
+        relative = f"{CHARTS_DIR}/{key}_{filename}"
+        if not os.path.exists(artifacts.path(relative)):
+            break
+        urls[name] = relative
+    else:
+        artifacts.use(urls.values(), result=result)
+        return {name: f"{settings.MEDIA_URL}{relative}" for name, relative in urls.items()}
+
+    with _lock:
+        if key in _failed:
+            error, failed_at = _failed[key]
+            if time.monotonic() - failed_at < RETRY_AFTER:
+                raise RuntimeError(f"Chart rendering failed: {error}")
+            del _failed[key]
+        if key not in _pending:
+            # The rollups are a few KB: hand them over instead of the reports
+            rollups = load_rollups(result).to_bytes()
+            pool = process_pool()
+            try:
+                future = pool.submit(render_charts, rollups, key)
+            except BrokenProcessPool:
+                discard_process_pool(pool)
+                pool = process_pool()
+                future = pool.submit(render_charts, rollups, key)
+            _pending[key] = future
+            future.add_done_callback(lambda f: _finished(key, pool, f))
+    return None
@@ -1,6 +1,11 @@
+import numpy as np
 import pandas as pd
 
-def new_attendance(df):
+from .punches import PunchCube, fold_weekdays
+from .rollups import Rollups
+from .shards import day_counts
+
+def new_attendance(df, staff_names=None):
     df['number'] = range(1, len(df) + 1)
     scor = df.loc[df['number'] > 4]
     # Select every 3rd row
@@ -26,81 +31,81 @@ def new_attendance(df):
     # Drop the helper 'number' column
     fin = new_score.drop('number', axis=1, errors='ignore')
     final = fin.dropna(axis=1, how='all')
-    
+
+    # With the staff names, hand back the compact punch array instead
+    if staff_names is not None:
+        return PunchCube.from_frame(final, staff_names)
     return final
 
-def extract_attendance_times(final_df, staff_names):
+def extract_attendance_times(final_df, staff_names=None, workers=None):
     """
     Extracts attendance times from DAY1–DAY32 columns,
     classifies them into Resume (entry) and Exit (leave),
     and returns two DataFrames:
     1. daily_summary_df → detailed day-by-day counts
     2. staff_totals_df → summarized totals per staff
+    Takes either the DAY frame plus staff names, or a PunchCube.
+    Large frames are parsed in row shards by up to `workers` processes
+    (default AGGREGATE_WORKERS, 1 for the serial pass), see shards.py.
     """
+    if isinstance(final_df, PunchCube):
+        return summarize_counts(final_df.staff, final_df.days, *final_df.day_counts())
+    day_frame, staff_names = PunchCube.prepare_frame(final_df, staff_names)
+    resume, exits = day_counts(day_frame, staff_names, workers)
+    return summarize_counts(list(staff_names), list(day_frame.columns), resume, exits)
+
+
+def summarize_counts(staff, days, resume, exits):
+    """
+    Builds the daily summary and staff totals from per staff/DAY column
+    resume and exit counts (arrays of shape (staff, days)).
+    """
+    # Group on integer staff codes (sorted like the names, blank names dropped
+    # like groupby does); the names are attached to the finished rows only
+    codes, names = pd.factorize(np.asarray(staff, dtype=object), sort=True)
+    if not days or len(staff) == 0:
+        return _summarize_frame(pd.DataFrame({"Staff": [], "Day": [], "Resume Count": [], "Exit Count": []}))
+
+    weekdays, resume, exits = fold_weekdays(days, resume, exits)
+    if len(names) == 0:
+        # Only blank names: let the groupby drop them, for the same empty frames
+        return _summarize_frame(pd.DataFrame({
+            "Staff": np.tile(np.asarray(list(staff)), len(weekdays)),
+            "Day": np.repeat(np.array(weekdays, dtype=object), len(staff)),
+            "Resume Count": resume.ravel(),
+            "Exit Count": exits.ravel(),
+        }))
+
+    valid = codes >= 0
+    resume_by_staff = np.zeros((len(names), len(weekdays)), dtype=np.int64)
+    exits_by_staff = np.zeros_like(resume_by_staff)
+    for i in range(len(weekdays)):
+        np.add.at(resume_by_staff[:, i], codes[valid], resume[i, valid])
+        np.add.at(exits_by_staff[:, i], codes[valid], exits[i, valid])
+
+    # Rows per staff in Day name order, as sort_values(["Staff", "Day"]) would give
+    day_order = np.argsort(np.array(weekdays, dtype=object), kind="stable")
+    names = np.asarray(names, dtype=object)
+    daily_summary_df = pd.DataFrame({
+        "Staff": np.repeat(names, len(weekdays)),
+        "Day": np.tile(np.array(weekdays, dtype=object)[day_order], len(names)),
+        "Resume Count": resume_by_staff[:, day_order].ravel(),
+        "Exit Count": exits_by_staff[:, day_order].ravel(),
+    })
+
+    staff_totals_df = pd.DataFrame({
+        "Staff": names,
+        "Resume Count": resume_by_staff.sum(axis=1),
+        "Exit Count": exits_by_staff.sum(axis=1),
+    })
+    staff_totals_df["Days Present"] = np.maximum(
+        staff_totals_df["Resume Count"], staff_totals_df["Exit Count"]
+    )
+    return daily_summary_df, staff_totals_df
 
-    # Normalize column names
-    final_df.columns = [col.strip().upper() for col in final_df.columns]
-
-    # Map each DAY column to weekday (rotates every 5 days)
-    weekday_cycle = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-    day_to_weekday = {f'DAY{i}': weekday_cycle[(i - 1) % 5] for i in range(1, 33)}
-
-    # Split strings like '11:5913:1715:3012:42...' into valid time chunks
-    def split_time_chunks(text):
-        cleaned = str(text).replace(" ", "").replace("\n", "")
-        return [
-            cleaned[i:i+5] for i in range(0, len(cleaned), 5)
-            if len(cleaned[i:i+5]) == 5 and ':' in cleaned[i:i+5]
-        ]
-
-    # Handle mismatch between staff_names and rows
-    expected_staff = len(staff_names)
-    actual_rows = len(final_df)
-    if actual_rows != expected_staff:
-        print(f"⚠️ WARNING: Mismatch between staff_names ({expected_staff}) and rows ({actual_rows}). Truncating to smaller length.")
-        min_len = min(expected_staff, actual_rows)
-        final_df = final_df.iloc[:min_len]
-        staff_names = staff_names[:min_len]
-
-    # Initialize data storage
-    summary_data = {
-        "Staff": [],
-        "Day": [],
-        "Resume Count": [],
-        "Exit Count": []
-    }
-
-    # Process each column (DAY1–DAY32)
-    for col in final_df.columns:
-        if not col.startswith("DAY"):
-            continue
-
-        weekday = day_to_weekday.get(col)
-        if weekday is None:
-            continue
-
-        for idx, cell in enumerate(final_df[col]):
-            times = split_time_chunks(cell)
-            resume_count = 0
-            exit_count = 0
-            for time in times:
-                try:
-                    hour = int(time[:2])
-                    if 7 <= hour <= 9:
-                        resume_count += 1
-                    elif 16 <= hour <= 19:
-                        exit_count += 1
-                except (ValueError, TypeError):
-                    continue
-
-            summary_data["Staff"].append(staff_names.iloc[idx] if isinstance(staff_names, pd.Series) else staff_names[idx])
-            summary_data["Day"].append(weekday)
-            summary_data["Resume Count"].append(resume_count)
-            summary_data["Exit Count"].append(exit_count)
-
-    # Convert to DataFrame
-    daily_summary_df = pd.DataFrame(summary_data)
 
+def _summarize_frame(daily_summary_df):
+    """Keyed groupby version of summarize_counts, for the degenerate inputs."""
     # Aggregate per staff per weekday
     daily_summary_df = (
         daily_summary_df.groupby(["Staff", "Day"], as_index=False)
@@ -120,12 +125,8 @@ def extract_attendance_times(final_df, staff_names):
         })
     )
 
-    # staff_totals_df["Days Present"] = (
-    #     daily_summary_df.groupby("Staff", as_index=False)
-    #     .agg({"Resume Count": "sum", "Exit Count": "sum"}).apply(lambda row: max(row["Resume Count"], row["Exit Count"]), axis=1))
-    staff_totals_df["Days Present"] = staff_totals_df.apply(
-        lambda row: max(row["Resume Count"], row["Exit Count"]),
-        axis=1
+    staff_totals_df["Days Present"] = np.maximum(
+        staff_totals_df["Resume Count"], staff_totals_df["Exit Count"]
     )
     # Sort for readability
     staff_totals_df = staff_totals_df.sort_values("Staff").reset_index(drop=True)
@@ -133,16 +134,23 @@ def extract_attendance_times(final_df, staff_names):
     return daily_summary_df, staff_totals_df
 
 
-import matplotlib
-matplotlib.use("Agg")  # Prevent GUI
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
 from django.conf import settings
 import base64
 from io import BytesIO
 
+
+def _plotting():
+    """matplotlib.pyplot and seaborn, imported on first use: parsing and the web workers never pay for them."""
+    import matplotlib
+    matplotlib.use("Agg")  # Prevent GUI
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    return plt, sns
+
+
 def get_graph():
+    plt, _ = _plotting()
     buffer = BytesIO()
     plt.savefig(buffer, format='png')
     buffer.seek(0)
@@ -151,11 +159,24 @@ def get_graph():
     graph = graph.decode('utf-8')
     buffer.close()
     return graph
+def _rollups(daily_summary_df, staff_totals_df=None):
+    """The Rollups of a result, from stored rollups, a PunchCube or the summary frames."""
+    if isinstance(daily_summary_df, Rollups):
+        return daily_summary_df
+    if isinstance(daily_summary_df, PunchCube):
+        daily_summary_df, staff_totals_df = extract_attendance_times(daily_summary_df)
+    if staff_totals_df is None:
+        staff_totals_df = daily_summary_df.drop_duplicates("Staff")
+    return Rollups.from_summary(daily_summary_df, staff_totals_df)
+
+
 def get_plot(daily_summary_df):
+    rollups = _rollups(daily_summary_df)
+    plt, sns = _plotting()
     plt.switch_backend('AGG')
     sns.set(style="whitegrid")
     plt.figure(figsize=(14,6))
-    daily_pivot = daily_summary_df.pivot(index="Staff", columns="Day", values="Resume Count").fillna(0)
+    daily_pivot = rollups.staff_matrix("Resume Count")
     daily_pivot.plot(kind='bar', stacked=False, figsize=(14,6))
     plt.title("Daily Resume Count per Staff")
     plt.ylabel("Resume Count")
@@ -170,50 +191,63 @@ def get_plot(daily_summary_df):
 
 
 
-def visualize_attendance(daily_summary_df, staff_totals_df, save_plots=True):
+def _save_figure(fig, path):
+    plt, _ = _plotting()
+    # Write to a temp name first: readers never see a half-written PNG
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    fig.savefig(tmp_path, format="png")
+    os.replace(tmp_path, path)
+    plt.close(fig)
+
+
+def visualize_attendance(daily_summary_df, staff_totals_df=None, save_plots=True, output_dir=None, prefix=""):
     """
-    Creates attendance charts and saves them to MEDIA_ROOT.
+    Creates attendance charts and saves them to output_dir (MEDIA_ROOT by default),
+    with file names starting with `prefix`.
+    The stored Rollups of a result or a PunchCube can be passed instead of
+    the two summary frames.
     Returns a dict of relative paths for use in templates.
     """
-    
-    # Ensure MEDIA_ROOT exists
-    os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
+    rollups = _rollups(daily_summary_df, staff_totals_df)
+    plt, sns = _plotting()
+    output_dir = output_dir or settings.MEDIA_ROOT
+    paths = {}
+
+    # Ensure the output folder exists
+    os.makedirs(output_dir, exist_ok=True)
 
     # --- Daily Percent Chart ---
     fig1, ax1 = plt.subplots(figsize=(12,6))
-    daily_percent = (daily_summary_df.groupby("Day")["Resume Count"].sum() / len(staff_totals_df) * 100)
+    daily_percent = rollups.weekday_percent()
     daily_percent.plot(kind='bar', color='skyblue', ax=ax1)
     ax1.set_title("Daily Attendance %")
     ax1.set_ylabel("Attendance %")
     ax1.set_xlabel("Day")
     fig1.tight_layout()
-    daily_percent_file = "daily_percent.png"
-    fig1.savefig(os.path.join(settings.MEDIA_ROOT, daily_percent_file))
-    plt.close(fig1)
+    daily_percent_file = f"{prefix}daily_percent.png"
+    _save_figure(fig1, os.path.join(output_dir, daily_percent_file))
     paths["daily_percent_path"] = daily_percent_file
 
     # --- Staff Performance Chart ---
     fig2, ax2 = plt.subplots(figsize=(12,6))
-    staff_totals_df.set_index("Staff")[["Resume Count","Exit Count"]].plot(
+    rollups.staff_totals().set_index("Staff")[["Resume Count","Exit Count"]].plot(
         kind='bar', stacked=True, color=['skyblue','salmon'], ax=ax2
     )
     ax2.set_title("Staff Total Resume & Exit")
     ax2.set_ylabel("Count")
     fig2.tight_layout()
-    staff_perf_file = "staff_performance.png"
-    fig2.savefig(os.path.join(settings.MEDIA_ROOT, staff_perf_file))
-    plt.close(fig2)
+    staff_perf_file = f"{prefix}staff_performance.png"
+    _save_figure(fig2, os.path.join(output_dir, staff_perf_file))
     paths["staff_performance_path"] = staff_perf_file
 
     # --- Absentee Heatmap ---
     fig3, ax3 = plt.subplots(figsize=(12,6))
-    heatmap_df = daily_summary_df.pivot(index="Staff", columns="Day", values="Resume Count").fillna(0)
+    heatmap_df = rollups.staff_matrix("Resume Count")
     sns.heatmap(heatmap_df, annot=True, fmt="g", cmap="YlGnBu", ax=ax3)
     ax3.set_title("Attendance Heatmap")
     fig3.tight_layout()
-    heatmap_file = "absentee_heatmap.png"
-    fig3.savefig(os.path.join(settings.MEDIA_ROOT, heatmap_file))
-    plt.close(fig3)
+    heatmap_file = f"{prefix}absentee_heatmap.png"
+    _save_figure(fig3, os.path.join(output_dir, heatmap_file))
     paths["absentee_heatmap_path"] = heatmap_file
 
     return paths
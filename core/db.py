@@ -0,0 +1,106 @@
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, connection
+
+logger = logging.getLogger(__name__)
+
+# Everything shares one SQLite file: request threads, the upload job threads
+# and management commands. The connections are set up in settings.DATABASES
+# (WAL journal, busy timeout, BEGIN IMMEDIATE, persistent connections). On top
+# of that, writes that still find the database locked after the busy timeout
+# are retried here, and stored results go through one writer thread per
+# process, which commits all the results pending at that moment in a single
+# transaction instead of one competing transaction each.
+LOCKED_MESSAGES = ("database is locked", "database table is locked")
+
+
+def is_locked(exc):
+    return isinstance(exc, OperationalError) and any(message in str(exc) for message in LOCKED_MESSAGES)
+
+
+def retry_locked(fn, *args, **kwargs):
+    """Calls fn(*args, **kwargs), retrying with backoff while SQLite reports the database locked."""
+    for attempt in range(settings.DB_WRITE_RETRIES + 1):
+        try:
+            return fn(*args, **kwargs)
+        except OperationalError as e:
+            # Inside an outer transaction the whole transaction has to be retried, by its owner
+            if not is_locked(e) or attempt == settings.DB_WRITE_RETRIES or connection.in_atomic_block:
+                raise
+            delay = settings.DB_RETRY_DELAY * 2 ** attempt * random.uniform(0.5, 1.5)
+            logger.warning("Database locked, retrying", extra={
+                "function": getattr(fn, "__name__", repr(fn)), "attempt": attempt + 1, "delay": round(delay, 3),
+            })
+            time.sleep(delay)
+
+
+class BatchWriter:
+    """
+    Runs write_many(items) -> [value per item] on a single thread for items
+    written from any thread. Items written while a batch is being committed
+    are taken into the next one together, up to DB_WRITE_BATCH.
+    """
+
+    def __init__(self, write_many, name):
+        self.write_many = write_many
+        self.name = name
+        self._lock = threading.Lock()
+        self._queue = None
+        self._pid = None
+
+    def _pending(self):
+        with self._lock:
+            # A forked worker process inherits the queue but not the thread
+            if self._pid != os.getpid():
+                self._queue = queue.SimpleQueue()
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, args=(self._queue,), name=self.name, daemon=True).start()
+            return self._queue
+
+    def write(self, items):
+        """Writes `items` on the writer thread and returns their values, or raises its error."""
+        items = list(items)
+        if connection.in_atomic_block:
+            # Part of the caller's transaction: the writer thread's connection can't join it
+            return self.write_many(items)
+        future = Future()
+        self._pending().put((items, future))
+        return future.result()
+
+    def _run(self, pending):
+        while True:
+            batch = [pending.get()]
+            while len(batch) < settings.DB_WRITE_BATCH:
+                try:
+                    batch.append(pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._commit(batch)
+            finally:
+                close_old_connections()
+
+    def _commit(self, batch):
+        try:
+            values = retry_locked(self.write_many, [item for items, _ in batch for item in items])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # Don't fail everyone's write for one bad item: write them one by one
+            logger.warning("Batched write failed, writing separately", extra={"writer": self.name, "batch": len(batch)})
+            for entry in batch:
+                self._commit([entry])
+            return
+        for items, future in batch:
+            future.set_result(values[:len(items)])
+            values = values[len(items):]
+        if len(batch) > 1:
+            logger.info("Batched write", extra={"writer": self.name, "batch": len(batch)})
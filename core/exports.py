@@ -0,0 +1,52 @@
+import csv
+import io
+import os
+
+from . import artifacts, metrics
+from .results import artifact_name, load_frame
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_CHUNK_ROWS = 5000
+
+
+def xlsx_artifact(result, which, sheet_name):
+    """
+    Path of the cached XLSX export for a stored result, built on first use.
+    The workbook is written in openpyxl write-only mode, so rows go straight
+    to disk instead of being held as cell objects in memory.
+    """
+    name = artifact_name(result, f"{which}.xlsx")
+    path = artifacts.path(name)
+    if os.path.exists(path):
+        artifacts.use([name], result=result)
+        return path
+
+    with artifacts.create(name, result=result) as scratch, metrics.stage("export_xlsx"):
+        write_xlsx(load_frame(result, which), sheet_name, scratch)
+    return path
+
+
+def write_xlsx(report, sheet_name, path):
+    """Writes a DataFrame as a one-sheet workbook in openpyxl write-only mode."""
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    ws.append([str(col) for col in report.columns])
+    for row in report.itertuples(index=False, name=None):
+        ws.append(row)
+    wb.save(path)
+
+
+def iter_csv(result, which, chunk_rows=CSV_CHUNK_ROWS):
+    """Yields a stored report as CSV text, a chunk of rows at a time."""
+    report = load_frame(result, which)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(report.columns)
+    for start in range(0, len(report), chunk_rows):
+        writer.writerows(report.iloc[start:start + chunk_rows].itertuples(index=False, name=None))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,60 @@
+from django.db.models import Count, Sum
+from django.db.models.functions import Substr
+
+from .models import AttendanceFact
+
+# Cross-month queries over the AttendanceFact table, aggregated in SQL.
+# Months are "YYYY-MM" strings, so ranges compare as text.
+
+
+def _between(queryset, start=None, end=None):
+    if start:
+        queryset = queryset.filter(month_id__gte=start)
+    if end:
+        queryset = queryset.filter(month_id__lte=end)
+    return queryset
+
+
+def staff_trend(staff, start=None, end=None):
+    """Resume/exit totals of one staff member per month, oldest first."""
+    rows = (
+        _between(AttendanceFact.objects.filter(staff__name=staff), start, end)
+        .values("month_id")
+        .annotate(resume=Sum("resume_count"), exits=Sum("exit_count"))
+        .order_by("month_id")
+    )
+    return list(rows)
+
+
+def monthly_summary(start=None, end=None):
+    """Per month: staff count, resume/exit totals and resumes per staff member."""
+    rows = list(
+        _between(AttendanceFact.objects.all(), start, end)
+        .values("month_id")
+        .annotate(
+            staff_count=Count("staff", distinct=True),
+            resume=Sum("resume_count"),
+            exits=Sum("exit_count"),
+        )
+        .order_by("month_id")
+    )
+    for row in rows:
+        row["resume_per_staff"] = round(row["resume"] / row["staff_count"], 2) if row["staff_count"] else 0
+    return rows
+
+
+def year_over_year(staff=None):
+    """
+    Resume/exit totals per calendar month and year, e.g. to compare
+    2024-03 with 2025-03. Optionally for one staff member only.
+    """
+    queryset = AttendanceFact.objects.all()
+    if staff:
+        queryset = queryset.filter(staff__name=staff)
+    rows = (
+        queryset.annotate(year=Substr("month_id", 1, 4), month=Substr("month_id", 6, 2))
+        .values("month", "year")
+        .annotate(resume=Sum("resume_count"), exits=Sum("exit_count"))
+        .order_by("month", "year")
+    )
+    return list(rows)
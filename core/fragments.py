@@ -0,0 +1,50 @@
+import hashlib
+import logging
+import uuid
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Rendered report fragments (HTML tables and their pager state) in Django's
+# cache, so flipping between the daily and monthly tabs is a cache read
+# instead of loading and rendering the stored result again. Keys carry the
+# identity of the stored result plus a per-month version token that
+# invalidate() drops when the month is replaced; entries of older versions
+# are never read again and age out of the cache.
+KEY_PREFIX = "fragments"
+
+
+def _version(month_id):
+    key = f"{KEY_PREFIX}:{month_id}:version"
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key) or version  # another thread got there first
+    return version
+
+
+def fragment_key(result, name, params=()):
+    """Cache key of fragment `name` of a stored result, rendered for the (key, value) `params`."""
+    query = hashlib.sha256(urlencode(sorted(params)).encode()).hexdigest()[:16]
+    identity = f"{result.pk}.{result.updated_at.timestamp():f}"
+    return f"{KEY_PREFIX}:{result.month_id}:{_version(result.month_id)}:{identity}:{name}:{query}"
+
+
+def cached_fragment(result, name, params, render):
+    """Returns the cached fragment, or render()'s value after caching it."""
+    key = fragment_key(result, name, params)
+    value = cache.get(key)
+    if value is None:
+        value = render()
+        cache.set(key, value)
+    else:
+        logger.debug("Fragment cache hit", extra={"month_id": result.month_id, "fragment": name})
+    return value
+
+
+def invalidate(month_id):
+    """Drops every cached fragment of a month, e.g. after a new upload replaced it."""
+    cache.delete(f"{KEY_PREFIX}:{month_id}:version")
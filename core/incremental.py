@@ -0,0 +1,86 @@
+import hashlib
+import io
+import os
+
+import numpy as np
+
+from .punches import PunchCube
+from .shards import day_counts
+
+# A month's export is re-uploaded every few days as it grows from DAY1 to DAY31.
+# Each stored result keeps a snapshot of its per staff/DAY column counts with a
+# fingerprint of every column, so the next upload of that month only parses the
+# columns whose text changed. Counts of a column depend on its cells alone.
+SNAPSHOT_VERSION = 1  # bump when the punch parser changes meaning
+
+
+def column_fingerprints(day_frame):
+    """Digest of each DAY column's text, exactly as the punch parser reads it."""
+    fingerprints = []
+    for i in range(day_frame.shape[1]):
+        # Variable-width strings: a fixed-width array would be as wide as the longest cell
+        text = day_frame.iloc[:, i].to_numpy(dtype=object).astype(np.dtypes.StringDType())
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.strings.str_len(text).astype(np.int64).tobytes())
+        digest.update("".join(text.tolist()).encode("utf-8", "surrogatepass"))
+        fingerprints.append(digest.hexdigest())
+    return fingerprints
+
+
+def snapshot_bytes(days, fingerprints, resume, exits):
+    buffer = io.BytesIO()
+    np.savez(
+        buffer,
+        version=np.array(SNAPSHOT_VERSION),
+        days=np.array(days, dtype=str),
+        fingerprints=np.array(fingerprints, dtype=str),
+        resume=resume.astype(np.int32),
+        exits=exits.astype(np.int32),
+    )
+    return buffer.getvalue()
+
+
+def load_snapshot(path):
+    """Reads a snapshot file, or returns None when there is none or it is outdated."""
+    if not path or not os.path.exists(path):
+        return None
+    with np.load(path, allow_pickle=False) as data:
+        if int(data["version"]) != SNAPSHOT_VERSION:
+            return None
+        return {
+            "fingerprints": [str(fp) for fp in data["fingerprints"]],
+            "resume": data["resume"],
+            "exits": data["exits"],
+        }
+
+
+def count_columns(final_df, staff_names, snapshot=None):
+    """
+    Resume/exit counts per staff and DAY column of new_attendance's frame.
+    Columns whose fingerprint is in `snapshot` reuse its counts; only the
+    others are parsed. Returns (staff_names, days, resume, exits, snapshot, parsed)
+    where `snapshot` is the new snapshot file content and `parsed` the number
+    of columns that had to be parsed.
+    """
+    day_frame, staff_names = PunchCube.prepare_frame(final_df, staff_names)
+    days = list(day_frame.columns)
+    fingerprints = column_fingerprints(day_frame)
+    resume = np.zeros((len(day_frame), len(days)), dtype=np.int64)
+    exits = np.zeros_like(resume)
+
+    known = {}
+    if snapshot is not None and snapshot["resume"].shape[0] == len(day_frame):
+        known = {fp: i for i, fp in enumerate(snapshot["fingerprints"])}
+    fresh = []
+    for j, fp in enumerate(fingerprints):
+        if fp in known:
+            resume[:, j] = snapshot["resume"][:, known[fp]]
+            exits[:, j] = snapshot["exits"][:, known[fp]]
+        else:
+            fresh.append(j)
+
+    if fresh:
+        resume[:, fresh], exits[:, fresh] = day_counts(day_frame.iloc[:, fresh], staff_names)
+
+    snapshot = snapshot_bytes(days, fingerprints, resume, exits)
+    return staff_names, days, resume, exits, snapshot, len(fresh)
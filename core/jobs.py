@@ -0,0 +1,206 @@
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . import artifacts, metrics
+from .db import retry_locked
+from .models import UploadJob
+from .results import get_result, store_result
+from .workbook import is_workbook
+
+logger = logging.getLogger(__name__)
+
+# Upload jobs are rows in the UploadJob table. A small thread pool drains them
+# (one thread per job, mostly waiting) and hands the CPU-bound parsing to a
+# process pool, so request threads never run pandas/openpyxl themselves (nor
+# import them: the parsing modules are imported by the worker-side functions).
+_lock = threading.Lock()
+_dispatcher = None
+_processes = None
+
+
+def _dispatcher_pool():
+    global _dispatcher
+    with _lock:
+        if _dispatcher is None:
+            _dispatcher = ThreadPoolExecutor(
+                max_workers=settings.UPLOAD_WORKERS, thread_name_prefix="upload-job"
+            )
+        return _dispatcher
+
+
+def process_pool():
+    """The shared worker process pool for CPU-bound work (parsing, charts)."""
+    global _processes
+    with _lock:
+        if _processes is None:
+            # spawn, not fork: the web server is multi-threaded. Spawned workers
+            # start from a bare interpreter, so they set Django up themselves.
+            _processes = ProcessPoolExecutor(
+                max_workers=settings.UPLOAD_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+        return _processes
+
+
+def discard_process_pool(pool):
+    """Drops a broken pool so the next process_pool() call starts a fresh one."""
+    global _processes
+    with _lock:
+        if _processes is pool:
+            _processes = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def process_workbook(path, snapshot_path=None):
+    """
+    Runs in a worker process: parse and aggregate one uploaded workbook.
+    With the snapshot of the month's previous upload, only DAY columns that
+    changed since then are parsed. Returns (daily_summary, staff_totals,
+    snapshot, samples) where `samples` are the stage metrics of this run.
+    """
+    from .code import summarize_counts
+    from .incremental import count_columns, load_snapshot
+    from .workbook import load_attendance_workbook
+
+    samples = []
+    with metrics.stage("load_workbook", samples):
+        cleaned_df, names = load_attendance_workbook(path)
+    with metrics.stage("extract_attendance_times", samples):
+        names, days, resume, exits, snapshot, parsed = count_columns(cleaned_df, names, load_snapshot(snapshot_path))
+        daily_summary, staff_totals = summarize_counts(names, days, resume, exits)
+    logger.debug("Workbook parsed", extra={"path": path, "parsed_days": parsed, "days": len(days)})
+    return daily_summary, staff_totals, snapshot, samples
+
+
+def process_punch_log(path, month_id=None):
+    """
+    Runs in a worker process: the CSV/raw punch log counterpart of
+    process_workbook, same return value (there is no snapshot, so None).
+    """
+    from .code import summarize_counts
+    from .punchlog import read_punch_log
+
+    samples = []
+    with metrics.stage("load_punch_log", samples):
+        names, days, resume, exits = read_punch_log(path, month_id)
+    with metrics.stage("extract_attendance_times", samples):
+        daily_summary, staff_totals = summarize_counts(names, days, resume, exits)
+    return daily_summary, staff_totals, None, samples
+
+
+def _worker():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _worker_alive(worker):
+    """False only for a process of this host that no longer exists."""
+    host, _, pid = worker.rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit() or os.name != "posix":
+        return True  # can't tell: left to UPLOAD_JOB_TIMEOUT
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _update(job_id, **fields):
+    # update() leaves auto_now alone; updated_at is what UPLOAD_JOB_TIMEOUT is measured from
+    retry_locked(UploadJob.objects.filter(pk=job_id).update, updated_at=timezone.now(), **fields)
+
+
+def recover_job(job):
+    """
+    Returns `job` after picking it up if the web process that dispatched it
+    has gone away (a restart or autoreload drops the in-memory dispatcher):
+    it is queued again and dispatched here. Unfinished jobs not updated for
+    UPLOAD_JOB_TIMEOUT are failed instead.
+    """
+    if job.finished:
+        return job
+    unfinished = UploadJob.objects.filter(
+        pk=job.pk, status__in=[UploadJob.STATUS_QUEUED, UploadJob.STATUS_RUNNING], worker=job.worker
+    )
+    if job.updated_at < timezone.now() - timedelta(seconds=settings.UPLOAD_JOB_TIMEOUT):
+        unfinished.update(
+            status=UploadJob.STATUS_FAILED, error="The upload was interrupted, please upload the file again.",
+            updated_at=timezone.now(),
+        )
+        logger.warning("Upload job expired", extra={"job_id": job.pk, "worker": job.worker})
+    elif not _worker_alive(job.worker):
+        # Only one poller wins the update, so the job is dispatched once
+        if unfinished.update(status=UploadJob.STATUS_QUEUED, progress=0, worker=_worker(), updated_at=timezone.now()):
+            logger.warning("Upload job recovered", extra={"job_id": job.pk, "worker": job.worker})
+            _dispatcher_pool().submit(run_job, job.pk)
+    else:
+        return job
+    return UploadJob.objects.get(pk=job.pk)
+
+
+def run_job(job_id):
+    """Claims a queued job, processes it and records the outcome."""
+    close_old_connections()
+    try:
+        claimed = retry_locked(
+            UploadJob.objects.filter(pk=job_id, status=UploadJob.STATUS_QUEUED).update,
+            status=UploadJob.STATUS_RUNNING, progress=10, worker=_worker(), updated_at=timezone.now(),
+        )
+        if not claimed:
+            return
+
+        job = UploadJob.objects.get(pk=job_id)
+        processes = process_pool()
+        try:
+            if is_workbook(job.file.path):
+                # Re-uploads of a month only parse the DAY columns that changed
+                previous = get_result(job.month_id)
+                snapshot_path = previous.snapshot_file.path if previous and previous.snapshot_file else None
+                future = processes.submit(process_workbook, job.file.path, snapshot_path)
+            else:
+                future = processes.submit(process_punch_log, job.file.path, job.month_id)
+            daily_summary, staff_totals, snapshot, samples = future.result()
+            _update(job_id, progress=80)
+            with metrics.stage("store_result", samples):
+                upload = (job.digest, job.file.name, job.file.size) if job.digest else None
+                store_result(job.month_id, daily_summary, staff_totals, snapshot, upload)
+            _update(job_id, status=UploadJob.STATUS_DONE, progress=100)
+            metrics.observe_samples(samples)
+            logger.info("Upload processed", extra={
+                "job_id": job_id,
+                "month_id": job.month_id,
+                "file": job.file.name,
+                "size": job.file.size,
+                "staff": len(staff_totals),
+                "stages": {name: round(seconds, 4) for name, seconds, _, _ in samples},
+            })
+        except Exception as e:
+            logger.exception("Upload failed", extra={"job_id": job_id, "file": job.file.name})
+            metrics.count_error("upload")
+            if isinstance(e, BrokenProcessPool):
+                discard_process_pool(processes)
+            _update(job_id, status=UploadJob.STATUS_FAILED, error=str(e))
+    finally:
+        close_old_connections()
+
+
+def enqueue_upload(uploaded_file, month_id, digest="", session_key=""):
+    """Stores the upload, queues it and returns the UploadJob at once."""
+    job = UploadJob.objects.create(file=uploaded_file, month_id=month_id, digest=digest, worker=_worker())
+    # The stored workbook belongs to the uploading session (artifacts.py)
+    artifacts.use([job.file.name], session_key=session_key)
+    _dispatcher_pool().submit(run_job, job.pk)
+    return job
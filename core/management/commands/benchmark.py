@@ -0,0 +1,205 @@
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from importlib.metadata import PackageNotFoundError, version
+
+import pandas as pd
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.code import extract_attendance_times, new_attendance, summarize_counts, visualize_attendance
+from core.exports import write_xlsx
+from core.punchlog import read_punch_log
+from core.synthetic import make_punch_log, make_workbook
+from core.workbook import load_attendance_workbook
+
+STAGES = [
+    "excel_load",
+    "new_attendance",
+    "workbook_loader",
+    "extract_attendance_times",
+    "punch_log_ingest",
+    "to_html",
+    "xlsx_export",
+    "visualize_attendance",
+]
+PACKAGES = ["Django", "pandas", "numpy", "openpyxl", "matplotlib", "seaborn"]
+
+
+def _package_versions():
+    versions = {}
+    for name in PACKAGES:
+        try:
+            versions[name] = version(name)
+        except PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def measure(fn, setup, repeat):
+    """
+    Times fn(*setup()) `repeat` times (setup is not timed), then runs it once
+    more under tracemalloc for the peak memory it allocates.
+    """
+    times = []
+    for _ in range(repeat):
+        args = setup()
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+
+    args = setup()
+    tracemalloc.start()
+    try:
+        fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "runs": repeat,
+        "min_s": round(min(times), 6),
+        "median_s": round(statistics.median(times), 6),
+        "mean_s": round(statistics.fmean(times), 6),
+        "peak_mb": round(peak / 1e6, 3),
+    }
+
+
+class Command(BaseCommand):
+    help = "Benchmark each stage of the attendance pipeline on synthetic device exports."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--staff", type=int, nargs="+", default=[100, 1000],
+            help="Staff counts to benchmark, one synthetic workbook each.",
+        )
+        parser.add_argument("--days", type=int, default=31, help="DAY columns per workbook.")
+        parser.add_argument("--punches", type=int, default=2, help="Average punches per present day.")
+        parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help="Processes for extract_attendance_times' row shards (default: AGGREGATE_WORKERS, 1 = serial).",
+        )
+        parser.add_argument(
+            "--stages", nargs="+", choices=STAGES, default=STAGES,
+            help="Stages to run (default: all).",
+        )
+        parser.add_argument(
+            "--output", default="benchmark-results.json",
+            help="JSON file the results are written to.",
+        )
+
+    def handle(self, *args, **options):
+        if not 1 <= options["days"] <= 31:
+            raise CommandError("--days must be between 1 and 31.")
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        if options["workers"] is not None and options["workers"] < 1:
+            raise CommandError("--workers must be at least 1.")
+
+        results = []
+        for staff in options["staff"]:
+            results.extend(self._run(staff, options))
+
+        report = {
+            "created": timezone.now().isoformat(),
+            "git_commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "packages": _package_versions(),
+            "params": {key: options[key] for key in ("staff", "days", "punches", "repeat", "seed", "workers", "stages")},
+            "results": results,
+        }
+        with open(options["output"], "w") as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} measurement(s) to {options['output']}"))
+
+    def _run(self, staff, options):
+        buffer = io.BytesIO()
+        make_workbook(buffer, staff=staff, days=options["days"], punches=options["punches"], seed=options["seed"])
+        data = buffer.getvalue()
+        self.stdout.write(f"{staff} staff x {options['days']} days: workbook {len(data) / 1e6:.2f} MB")
+
+        # Inputs of each stage come from running the previous one once, untimed
+        df_record = pd.read_excel(io.BytesIO(data), sheet_name="Logs")
+        df_names = pd.read_excel(io.BytesIO(data), sheet_name="Summary")
+        names = df_names.iloc[3:, 1]
+        cleaned_df = new_attendance(df_record.copy())
+        daily_summary, staff_totals = extract_attendance_times(cleaned_df.copy(), names)
+
+        def excel_load(upload):
+            pd.read_excel(upload, sheet_name="Logs")
+            upload.seek(0)
+            pd.read_excel(upload, sheet_name="Summary")
+
+        def to_html():
+            daily_summary.to_html(classes="table table-bordered", index=False)
+            staff_totals.to_html(classes="table table-bordered", index=False)
+
+        stages = {
+            "excel_load": (excel_load, lambda: (io.BytesIO(data),)),
+            "new_attendance": (new_attendance, lambda: (df_record.copy(),)),
+            "workbook_loader": (load_attendance_workbook, lambda: (io.BytesIO(data),)),
+            "extract_attendance_times": (
+                extract_attendance_times, lambda: (cleaned_df.copy(), names, options["workers"]),
+            ),
+            "to_html": (to_html, tuple),
+        }
+
+        results = []
+        with tempfile.TemporaryDirectory() as tmp:
+            # The same punches as a CSV log: read and aggregated in one stage
+            punch_log = os.path.join(tmp, "punches.csv")
+            make_punch_log(punch_log, staff=staff, days=options["days"], punches=options["punches"], seed=options["seed"])
+
+            def punch_log_ingest():
+                summarize_counts(*read_punch_log(punch_log))
+
+            stages["punch_log_ingest"] = (punch_log_ingest, tuple)
+
+            def xlsx_export():
+                write_xlsx(daily_summary, "Daily Attendance Report", os.path.join(tmp, "daily.xlsx"))
+                write_xlsx(staff_totals, "Monthly Attendance Report", os.path.join(tmp, "monthly.xlsx"))
+
+            stages["xlsx_export"] = (xlsx_export, tuple)
+            stages["visualize_attendance"] = (
+                visualize_attendance, lambda: (daily_summary, staff_totals, True, tmp),
+            )
+
+            for name in STAGES:
+                if name not in options["stages"]:
+                    continue
+                fn, setup = stages[name]
+                timing = measure(fn, setup, options["repeat"])
+                self.stdout.write(
+                    f"  {name:<26} {timing['median_s'] * 1000:10.1f} ms  peak {timing['peak_mb']:8.1f} MB"
+                )
+                results.append({
+                    "staff": staff,
+                    "days": options["days"],
+                    "punches": options["punches"],
+                    "workbook_bytes": len(data),
+                    "stage": name,
+                    **timing,
+                })
+        return results
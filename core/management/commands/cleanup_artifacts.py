@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.artifacts import sweep
+
+
+class Command(BaseCommand):
+    help = "Evict expired, ownerless and over-quota exports, charts and uploads from the artifact store."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Only report what would be removed.",
+        )
+
+    def handle(self, *args, **options):
+        stats = sweep(dry_run=options["dry_run"])
+        verb = "Would remove" if options["dry_run"] else "Removed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {stats['files']} file(s), {stats['bytes'] / 1e6:.1f} MB"
+        ))
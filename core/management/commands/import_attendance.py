@@ -0,0 +1,129 @@
+import glob
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+
+from core.jobs import process_punch_log, process_workbook
+from core.results import store_results
+from core.upload_cache import cache_key, hash_upload
+from core.workbook import is_workbook
+
+MONTH_PATTERN = r"(\d{4})[-_](\d{2})"
+EXTENSIONS = ("*.xlsx", "*.csv")
+
+
+def import_workbook(path, month_id):
+    """Runs in a worker process: returns (daily_summary, staff_totals, snapshot, seconds)."""
+    start = time.perf_counter()
+    if is_workbook(path):
+        daily_summary, staff_totals, snapshot, _ = process_workbook(path)
+    else:
+        daily_summary, staff_totals, snapshot, _ = process_punch_log(path, month_id)
+    return daily_summary, staff_totals, snapshot, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = "Bulk-import a directory (or glob) of monthly attendance workbooks or CSV punch logs in parallel."
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Directory of .xlsx/.csv files, or a glob pattern.")
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count() or 1,
+            help="Worker processes (default: all cores).",
+        )
+        parser.add_argument(
+            "--month-pattern", default=MONTH_PATTERN,
+            help="Regex with (year)(month) groups matched against each file name.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=12,
+            help="Months written to the database per bulk write.",
+        )
+
+    def handle(self, *args, **options):
+        source = options["source"]
+        patterns = [os.path.join(source, ext) for ext in EXTENSIONS] if os.path.isdir(source) else [source]
+        paths = sorted(path for pattern in patterns for path in glob.glob(pattern))
+        if not paths:
+            raise CommandError(f"No workbooks or punch logs found for '{source}'.")
+
+        month_re = re.compile(options["month_pattern"])
+        months, failures = {}, []
+        for path in paths:
+            match = month_re.search(os.path.basename(path))
+            if not match:
+                failures.append((path, "no month in file name"))
+            elif not 1 <= int(match.group(2)) <= 12:
+                failures.append((path, f"invalid month '{match.group(0)}' in file name"))
+            else:
+                month_id = f"{match.group(1)}-{match.group(2)}"
+                # One file per month: the last one in path order, e.g. att_2024-05_fixed.xlsx over att_2024-05.xlsx
+                if month_id in months:
+                    failures.append((months[month_id], f"skipped, {month_id} is imported from {os.path.basename(path)}"))
+                months[month_id] = path
+        jobs = {path: month_id for month_id, path in sorted(months.items(), key=lambda item: item[1])}
+
+        self.stdout.write(f"Importing {len(jobs)} file(s) with {options['workers']} worker(s)...")
+        started = time.perf_counter()
+        pending, imported, total_bytes = [], 0, 0
+
+        with ProcessPoolExecutor(
+            max_workers=options["workers"],
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as pool:
+            futures = {pool.submit(import_workbook, path, month_id): path for path, month_id in jobs.items()}
+            for future in as_completed(futures):
+                path = futures[future]
+                name = os.path.basename(path)
+                try:
+                    daily_summary, staff_totals, snapshot, seconds = future.result()
+                except Exception as e:
+                    failures.append((path, str(e)))
+                    self.stderr.write(self.style.ERROR(f"FAILED {name}: {e}"))
+                    continue
+
+                size = os.path.getsize(path)
+                total_bytes += size
+                self.stdout.write(
+                    f"{name} -> {jobs[path]}: {len(staff_totals)} staff in {seconds:.2f}s "
+                    f"({size / 1e6 / max(seconds, 1e-9):.1f} MB/s)"
+                )
+                pending.append((path, daily_summary, staff_totals, snapshot))
+                if len(pending) >= options["batch_size"]:
+                    imported += self._flush(pending, jobs)
+
+        imported += self._flush(pending, jobs)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} month(s) in {elapsed:.1f}s "
+            f"({imported / max(elapsed, 1e-9) * 60:.1f} files/min, {total_bytes / 1e6 / max(elapsed, 1e-9):.1f} MB/s)"
+        ))
+        for path, error in failures:
+            self.stderr.write(self.style.ERROR(f"Failed: {path}: {error}"))
+
+    def _flush(self, pending, jobs):
+        """Writes the batch of finished months in one bulk write, then empties it."""
+        if not pending:
+            return 0
+        # Later dashboard uploads of the same files are served from the dedup cache
+        store_results(
+            (jobs[path], daily_summary, staff_totals, snapshot, self._upload(path, jobs[path]))
+            for path, daily_summary, staff_totals, snapshot in pending
+        )
+        count = len({jobs[path] for path, *_ in pending})
+        pending.clear()
+        return count
+
+    def _upload(self, path, month_id):
+        """(dedup key, file name, size) of a file, for its store_results item."""
+        with open(path, "rb") as f:
+            digest = cache_key(hash_upload(File(f)), month_id, workbook=is_workbook(path))
+        return digest, os.path.basename(path), os.path.getsize(path)
@@ -0,0 +1,138 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Per-stage timings and memory of the attendance pipeline, aggregated as
+# histograms in this process and served in Prometheus text format at /metrics.
+# Stages that run in the upload worker processes are recorded into a list of
+# samples there, returned with the result and merged in by the caller.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+MEMORY_BUCKETS = (1e6, 4e6, 16e6, 64e6, 256e6, 1e9, 4e9)
+
+HISTOGRAMS = {
+    "provost_stage_duration_seconds": ("Time spent in each pipeline stage.", DURATION_BUCKETS),
+    "provost_stage_memory_bytes": ("Growth of the process resident memory over each pipeline stage.", MEMORY_BUCKETS),
+}
+
+_lock = threading.Lock()
+_histograms = {}  # (metric, stage) -> [bucket counts..., sum, count]
+_errors = {}      # stage -> count
+
+
+def _max_rss():
+    """Peak resident memory of this process in bytes (0 where unsupported)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _rss():
+    """
+    Current resident memory of this process in bytes (0 where unsupported).
+    Unlike the peak it goes down again, so it can be compared per stage in
+    long-lived worker processes.
+    """
+    if resource is not None:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * resource.getpagesize()
+        except OSError:
+            pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    return 0
+
+
+def _observe(metric, stage, value):
+    buckets = HISTOGRAMS[metric][1]
+    series = _histograms.setdefault((metric, stage), [0] * (len(buckets) + 2))
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            series[i] += 1
+    series[-2] += value
+    series[-1] += 1
+
+
+def observe(stage, seconds, memory=0, failed=False):
+    """Records one run of a stage."""
+    with _lock:
+        _observe("provost_stage_duration_seconds", stage, seconds)
+        _observe("provost_stage_memory_bytes", stage, memory)
+        if failed:
+            _errors[stage] = _errors.get(stage, 0) + 1
+
+
+def count_error(stage):
+    """Records a failed stage run whose timing is unknown, e.g. one lost in a worker."""
+    with _lock:
+        _errors[stage] = _errors.get(stage, 0) + 1
+
+
+def observe_samples(samples):
+    """Records the samples collected by stage(..., samples=...) in a worker process."""
+    for sample in samples:
+        observe(*sample)
+
+
+@contextmanager
+def stage(name, samples=None):
+    """
+    Times a block and samples the growth of resident memory over it (RSS
+    after minus RSS before, 0 if it shrank). The run is recorded here, or
+    appended to `samples` as (name, seconds, memory, failed) when given.
+    """
+    rss = _rss()
+    start = time.perf_counter()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        sample = (name, time.perf_counter() - start, max(0, _rss() - rss), failed)
+        if samples is None:
+            observe(*sample)
+        else:
+            samples.append(sample)
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        for metric, (help_text, buckets) in HISTOGRAMS.items():
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for (name, stage_name), series in sorted(_histograms.items()):
+                if name != metric:
+                    continue
+                for bound, count in zip(buckets, series):
+                    lines.append(f"{metric}_bucket{_labels(stage=stage_name, le=f'{bound:g}')} {count}")
+                lines.append(f"{metric}_bucket{_labels(stage=stage_name, le='+Inf')} {series[-1]}")
+                lines.append(f"{metric}_sum{_labels(stage=stage_name)} {series[-2]:g}")
+                lines.append(f"{metric}_count{_labels(stage=stage_name)} {series[-1]}")
+
+        lines.append("# HELP provost_stage_errors_total Pipeline stage runs that raised.")
+        lines.append("# TYPE provost_stage_errors_total counter")
+        for stage_name, count in sorted(_errors.items()):
+            lines.append(f"provost_stage_errors_total{_labels(stage=stage_name)} {count}")
+
+    lines.append("# HELP provost_process_max_rss_bytes Peak resident memory of this web process.")
+    lines.append("# TYPE provost_process_max_rss_bytes gauge")
+    lines.append(f"provost_process_max_rss_bytes {_max_rss()}")
+    return "\n".join(lines) + "\n"
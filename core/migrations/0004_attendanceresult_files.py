@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:24
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_uploadjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendanceresult',
+            name='daily_file',
+            field=models.FileField(blank=True, upload_to='results/'),
+        ),
+        migrations.AddField(
+            model_name='attendanceresult',
+            name='totals_file',
+            field=models.FileField(blank=True, upload_to='results/'),
+        ),
+        migrations.AddField(
+            model_name='attendanceresult',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RemoveField(
+            model_name='uploadjob',
+            name='daily_path',
+        ),
+        migrations.RemoveField(
+            model_name='uploadjob',
+            name='totals_path',
+        ),
+        migrations.AddField(
+            model_name='uploadjob',
+            name='month_id',
+            field=models.CharField(default='', max_length=10),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_attendanceresult_files'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadedresult',
+            name='attendance',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='core.attendanceresult'),
+        ),
+        migrations.AddField(
+            model_name='uploadedresult',
+            name='hits',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='uploadedresult',
+            name='last_used',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='uploadedresult',
+            name='size',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='uploadjob',
+            name='digest',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='uploadedresult',
+            name='file',
+            field=models.FileField(blank=True, upload_to='results/'),
+        ),
+        migrations.AlterField(
+            model_name='uploadedresult',
+            name='result_id',
+            field=models.CharField(max_length=64, unique=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_upload_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendanceresult',
+            name='snapshot_file',
+            field=models.FileField(blank=True, upload_to='results/'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_facts(apps, schema_editor):
+    # Facts for results stored before the table existed
+    from core.results import frame_from_file
+
+    AttendanceResult = apps.get_model('core', 'AttendanceResult')
+    AttendanceFact = apps.get_model('core', 'AttendanceFact')
+    for result in AttendanceResult.objects.exclude(daily_file=''):
+        try:
+            with result.daily_file.open('rb') as f:
+                daily = frame_from_file(f)
+        except (OSError, ValueError, KeyError):
+            continue  # file missing or unreadable: the month's next upload rebuilds it
+        AttendanceFact.objects.bulk_create([
+            AttendanceFact(
+                attendance=result, month_id=result.month_id, staff=str(staff), day=day,
+                resume_count=int(resume), exit_count=int(exits),
+            )
+            for staff, day, resume, exits in daily[['Staff', 'Day', 'Resume Count', 'Exit Count']].itertuples(index=False, name=None)
+        ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_attendanceresult_snapshot_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month_id', models.CharField(max_length=10)),
+                ('staff', models.CharField(max_length=255)),
+                ('day', models.CharField(max_length=10)),
+                ('resume_count', models.PositiveIntegerField(default=0)),
+                ('exit_count', models.PositiveIntegerField(default=0)),
+                ('attendance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facts', to='core.attendanceresult')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['staff', 'month_id'], name='fact_staff_month_idx'), models.Index(fields=['month_id', 'staff'], name='fact_month_staff_idx')],
+            },
+        ),
+        migrations.RunPython(populate_facts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def intern_fact_staff(apps, schema_editor):
+    # Existing facts carry the staff name; point them at registry rows instead
+    Staff = apps.get_model('core', 'Staff')
+    AttendanceFact = apps.get_model('core', 'AttendanceFact')
+    names = AttendanceFact.objects.values_list('staff_name', flat=True).distinct()
+    Staff.objects.bulk_create([Staff(name=name) for name in names], ignore_conflicts=True)
+    for staff in Staff.objects.all():
+        AttendanceFact.objects.filter(staff_name=staff.name).update(staff=staff)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_attendancefact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Staff',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('first_seen', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='attendancefact',
+            name='fact_staff_month_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='attendancefact',
+            name='fact_month_staff_idx',
+        ),
+        migrations.RenameField(
+            model_name='attendancefact',
+            old_name='staff',
+            new_name='staff_name',
+        ),
+        migrations.AddField(
+            model_name='attendancefact',
+            name='staff',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='facts', to='core.staff'),
+        ),
+        migrations.RunPython(intern_fact_staff, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='attendancefact',
+            name='staff_name',
+        ),
+        migrations.AlterField(
+            model_name='attendancefact',
+            name='staff',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facts', to='core.staff'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancefact',
+            index=models.Index(fields=['staff', 'month_id'], name='fact_staff_month_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancefact',
+            index=models.Index(fields=['month_id', 'staff'], name='fact_month_staff_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:01
+
+from django.core.files.base import ContentFile
+from django.db import migrations, models
+
+
+def populate_rollups(apps, schema_editor):
+    # Rollups for results stored before they were computed at ingest
+    from core.results import frame_from_file
+    from core.rollups import Rollups
+
+    AttendanceResult = apps.get_model('core', 'AttendanceResult')
+    for result in AttendanceResult.objects.exclude(daily_file='').exclude(totals_file=''):
+        try:
+            with result.daily_file.open('rb') as daily, result.totals_file.open('rb') as totals:
+                rollups = Rollups.from_summary(frame_from_file(daily), frame_from_file(totals))
+        except (OSError, ValueError, KeyError):
+            continue  # file missing or unreadable: computed on read until the month's next upload
+        result.rollups_file.save(f'{result.month_id}_rollups.npz', ContentFile(rollups.to_bytes()), save=False)
+        result.save(update_fields=['rollups_file'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_artifact'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendanceresult',
+            name='rollups_file',
+            field=models.FileField(blank=True, upload_to='results/'),
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
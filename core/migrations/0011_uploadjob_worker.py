@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_attendanceresult_rollups_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadjob',
+            name='worker',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
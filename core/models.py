@@ -1,16 +1,113 @@
 from django.db import models
 from django.utils import timezone
 
+class AttendanceResult(models.Model):
+    month_id = models.CharField(max_length=10, unique=True)
+    report_data = models.JSONField(blank=True, null=True)
+    daily_file = models.FileField(upload_to='results/', blank=True)
+    totals_file = models.FileField(upload_to='results/', blank=True)
+    # Per DAY column counts + fingerprints, for incremental re-uploads (incremental.py)
+    snapshot_file = models.FileField(upload_to='results/', blank=True)
+    # Precomputed aggregates for charts and analytics (rollups.py)
+    rollups_file = models.FileField(upload_to='results/', blank=True)
+    uploaded_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.month_id
+
+
+class Staff(models.Model):
+    # Staff registry: every name seen in an upload is interned once and keeps
+    # its integer id across months (see staff.py).
+    name = models.CharField(max_length=255, unique=True)
+    first_seen = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.name
+
+
+class AttendanceFact(models.Model):
+    # One row per staff member and weekday of a stored month: the daily summary
+    # in normalized form, so cross-month questions are answered with SQL
+    # aggregates instead of loading every result file. Rebuilt with the result.
+    attendance = models.ForeignKey(AttendanceResult, on_delete=models.CASCADE, related_name='facts')
+    month_id = models.CharField(max_length=10)
+    staff = models.ForeignKey(Staff, on_delete=models.CASCADE, related_name='facts')
+    day = models.CharField(max_length=10)
+    resume_count = models.PositiveIntegerField(default=0)
+    exit_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['staff', 'month_id'], name='fact_staff_month_idx'),
+            models.Index(fields=['month_id', 'staff'], name='fact_month_staff_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.staff_id} {self.month_id} {self.day}"
+
+
 class UploadedResult(models.Model):
-    result_id = models.CharField(max_length=50, unique=True)
-    file = models.FileField(upload_to='results/')
+    # Dedup cache entry: result_id is the upload's key (upload_cache.cache_key,
+    # the SHA-256 of a workbook) and `attendance` the month it produced. Entries are dropped when that month is
+    # replaced with different content, and evicted by age/count (upload_cache.py).
+    result_id = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='results/', blank=True)
+    attendance = models.ForeignKey(AttendanceResult, on_delete=models.CASCADE, null=True, blank=True)
+    size = models.BigIntegerField(default=0)
+    hits = models.PositiveIntegerField(default=0)
     uploaded_at = models.DateTimeField(default=timezone.now)
+    last_used = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
         return self.result_id
-    
-class AttendanceResult(models.Model):
-    month_id = models.CharField(max_length=10, unique=True)
-    report_data = models.JSONField(blank=True, null=True)
-    uploaded_at = models.DateTimeField(auto_now_add=True)
 
+
+class Artifact(models.Model):
+    # A derived or scratch file in default storage (exports, charts, uploads),
+    # owned by the result and/or session it was made for and evicted by age,
+    # owner and total size (artifacts.py).
+    name = models.CharField(max_length=255, unique=True)
+    attendance = models.ForeignKey(
+        AttendanceResult, on_delete=models.SET_NULL, null=True, blank=True, related_name='artifacts'
+    )
+    session_key = models.CharField(max_length=40, blank=True)
+    size = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    last_used = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return self.name
+
+
+
+class UploadJob(models.Model):
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    file = models.FileField(upload_to='uploads/')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    month_id = models.CharField(max_length=10)
+    digest = models.CharField(max_length=64, blank=True)
+    # host:pid of the web process that dispatched the job (jobs.recover_job)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+    def __str__(self):
+        return f"Upload job {self.pk} ({self.status})"
@@ -0,0 +1,75 @@
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+# Async views hand their blocking work (ORM, pandas, file I/O) to one bounded
+# thread pool, so an ASGI worker's event loop stays free to serve page loads
+# while uploads and exports are being crunched. Parsing itself still happens
+# in the upload worker processes (jobs.py).
+FILE_CHUNK_SIZE = 64 * 1024
+
+_lock = threading.Lock()
+_executor = None
+_upload_slots = weakref.WeakKeyDictionary()  # event loop -> asyncio.Semaphore
+
+
+def view_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.VIEW_WORKERS, thread_name_prefix="view")
+        return _executor
+
+
+def _call(fn, args, kwargs):
+    # Pool threads outlive requests: release their DB connection like a request would
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Runs fn(*args, **kwargs) on the bounded view pool and awaits the result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(view_executor(), functools.partial(_call, fn, args, kwargs))
+
+
+def upload_slot():
+    """
+    Semaphore limiting uploads handled at once (UPLOAD_CONCURRENCY) on this
+    event loop; further uploads wait for a slot instead of piling up in memory.
+    """
+    loop = asyncio.get_running_loop()
+    slots = _upload_slots.get(loop)
+    if slots is None:
+        slots = _upload_slots[loop] = asyncio.Semaphore(settings.UPLOAD_CONCURRENCY)
+    return slots
+
+
+async def aiter_blocking(iterator):
+    """Async iterator over a blocking one; each step runs on the view pool."""
+    done = object()
+    while True:
+        item = await run_blocking(next, iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+async def aiter_file(path, chunk_size=FILE_CHUNK_SIZE):
+    """Streams a file in chunks without blocking the event loop."""
+    f = await run_blocking(open, path, "rb")
+    try:
+        while True:
+            chunk = await run_blocking(f.read, chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        await run_blocking(f.close)
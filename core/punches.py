@@ -0,0 +1,227 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Map each DAY column to weekday (rotates every 5 days)
+WEEKDAY_CYCLE = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+DAY_TO_WEEKDAY = {f'DAY{i}': WEEKDAY_CYCLE[(i - 1) % 5] for i in range(1, 33)}
+
+# Cells longer than this many characters skip the vectorized parser
+LONG_CELL = 64
+
+# Punch hours that count as a resume (entry) or an exit (leave)
+RESUME_HOURS = (7, 9)
+EXIT_HOURS = (16, 19)
+
+
+def _parse_hours(chunks):
+    """
+    Reads the hour (first two characters) of every 5-character punch chunk.
+    `chunks` is a uint32 code point array of shape (..., 5). Returns the hours
+    and a mask of chunks whose prefix is a valid integer, as int() would see it.
+    """
+    # Code points are unsigned, so anything below '0' wraps to a large value
+    d0 = chunks[..., 0] - ord('0')
+    d1 = chunks[..., 1] - ord('0')
+    is_digit = (d0 <= 9) & (d1 <= 9)
+    hours = np.where(is_digit, d0 * 10 + d1, 0).astype(np.int64)
+    ok = is_digit.copy()
+
+    # Rare prefixes like '+8' or unicode digits: defer to int() once per distinct pair
+    odd = ~is_digit & (chunks[..., 4] != 0)
+    if odd.any():
+        pairs = chunks[..., :2][odd]
+        uniq, inverse = np.unique(pairs, axis=0, return_inverse=True)
+        parsed = np.zeros(len(uniq), dtype=np.int64)
+        valid = np.zeros(len(uniq), dtype=bool)
+        for i, (a, b) in enumerate(uniq):
+            try:
+                parsed[i] = int(chr(a) + chr(b))
+                valid[i] = True
+            except ValueError:
+                continue
+        hours[odd] = parsed[inverse.ravel()]
+        ok[odd] = valid[inverse.ravel()]
+    return hours, ok
+
+
+def _parse_cell(text):
+    """
+    parse_punches for a single cell, chunk by chunk like the original loop;
+    returns the punches as minutes since midnight.
+    """
+    cleaned = text.replace(" ", "").replace("\n", "")
+    minutes = []
+    for i in range(0, len(cleaned) - 4, 5):
+        chunk = cleaned[i:i + 5]
+        if ":" not in chunk:
+            continue
+        try:
+            hour = int(chunk[:2])
+        except ValueError:
+            continue
+        if hour < 0:
+            continue
+        mins = chunk[3:5]
+        minutes.append(hour * 60 + (min(int(mins), 59) if mins.isascii() and mins.isdigit() else 0))
+    return minutes
+
+
+def _parse_short(text):
+    """parse_punches on a fixed-width str array; its width is that of the longest cell."""
+    n = len(text)
+    if n == 0 or text.itemsize == 0:
+        return np.zeros(n, dtype=np.int64), np.zeros(0, dtype=np.uint16)
+
+    # Spaces and newlines are not part of the punches; only a few cells carry them
+    codes = text.view(np.uint32).reshape(n, -1)
+    dirty = ((codes == ord(' ')) | (codes == ord('\n'))).any(axis=1)
+    if dirty.any():
+        text[dirty] = [s.replace(" ", "").replace("\n", "") for s in text[dirty]]
+
+    # (cells, chunks, 5) array of code points; padding shows up as 0
+    width = codes.shape[1]
+    pad = -width % 5
+    if pad:
+        codes = np.pad(codes, ((0, 0), (0, pad)))
+    chunks = codes.reshape(n, -1, 5)
+    colon = chunks == ord(':')
+    is_punch = (chunks[..., 4] != 0) & (colon[..., 0] | colon[..., 1] | colon[..., 2] | colon[..., 3] | colon[..., 4])
+    hours, ok = _parse_hours(chunks)
+    # Negative hours ('-1:00') never count as resume or exit, so they are not kept
+    is_punch &= ok & (hours >= 0)
+
+    # Minutes are best effort ('07:5x' keeps its hour); clamped so minutes // 60 is the hour
+    m0 = chunks[..., 3] - ord('0')
+    m1 = chunks[..., 4] - ord('0')
+    mins = np.where((m0 <= 9) & (m1 <= 9), np.minimum(m0 * 10 + m1, 59), 0)
+    minutes = (hours * 60 + mins)[is_punch].astype(np.uint16)
+    return is_punch.sum(axis=1, dtype=np.int64), minutes
+
+
+def parse_punches(cells):
+    """
+    Vectorized punch parser.
+    Takes a flat sequence of raw cell values like '07:5512:1016:45' and returns
+    (per_cell, minutes): the number of punches in each cell and the punches
+    themselves as minutes since midnight, cell after cell. Each cell is cut into
+    5-character chunks; chunks containing ':' with an integer hour are punches.
+    """
+    text = np.asarray(cells, dtype=object).astype(np.dtypes.StringDType())
+    lengths = np.strings.str_len(text)
+    # The fixed-width array is as wide as its longest cell: the odd huge cell
+    # (up to 32,767 characters in Excel) is parsed on its own instead
+    long = lengths > LONG_CELL
+    if not long.any():
+        return _parse_short(text.astype(f"U{max(lengths.max(initial=0), 1)}"))
+
+    short = ~long
+    per_cell = np.zeros(len(text), dtype=np.int64)
+    per_cell[short], short_minutes = _parse_short(text[short].astype(f"U{max(lengths[short].max(initial=0), 1)}"))
+    long_minutes = [_parse_cell(str(cell)) for cell in text[long]]
+    per_cell[long] = [len(punches) for punches in long_minutes]
+
+    # Short cells' punches keep their order, each cell's run moved to its offset
+    starts = np.cumsum(per_cell) - per_cell
+    short_counts = per_cell[short]
+    runs = np.repeat(starts[short] - (np.cumsum(short_counts) - short_counts), short_counts)
+    minutes = np.zeros(int(per_cell.sum()), dtype=np.uint16)
+    minutes[runs + np.arange(len(short_minutes))] = short_minutes
+    for start, punches in zip(starts[long], long_minutes):
+        minutes[start:start + len(punches)] = punches
+    return per_cell, minutes
+
+
+class PunchCube:
+    """
+    Staff × day × punch array of one attendance sheet.
+
+    Punches are uint16 minutes since midnight in one flat array, in ragged
+    (CSR) layout: the punches of staff `s` on day column `d` are
+    minutes[offsets[c]:offsets[c + 1]] with c = s * len(days) + d.
+    A month for 5,000 staff takes a couple of MB.
+    """
+
+    def __init__(self, staff, days, offsets, minutes):
+        self.staff = np.asarray(staff, dtype=object)
+        self.days = list(days)
+        self.offsets = offsets
+        self.minutes = minutes
+
+    @staticmethod
+    def prepare_frame(final_df, staff_names):
+        """
+        Normalizes the column names of new_attendance's frame, lines rows up
+        with the staff names and keeps the DAY1–DAY32 columns only.
+        Returns (day_frame, staff_names).
+        """
+        # Normalize column names
+        final_df.columns = [col.strip().upper() for col in final_df.columns]
+
+        # Handle mismatch between staff_names and rows
+        expected_staff = len(staff_names)
+        actual_rows = len(final_df)
+        if actual_rows != expected_staff:
+            logger.warning(
+                "Mismatch between staff names and rows, truncating to the smaller length",
+                extra={"staff_names": expected_staff, "rows": actual_rows},
+            )
+            min_len = min(expected_staff, actual_rows)
+            final_df = final_df.iloc[:min_len]
+            staff_names = staff_names[:min_len]
+
+        # Only DAY1–DAY32 columns count
+        day_cols = [i for i, col in enumerate(final_df.columns) if col in DAY_TO_WEEKDAY]
+        return final_df.iloc[:, day_cols], staff_names
+
+    @classmethod
+    def from_frame(cls, final_df, staff_names):
+        """Builds the cube from the DAY1–DAY32 frame of new_attendance and the staff names."""
+        day_frame, staff_names = cls.prepare_frame(final_df, staff_names)
+        return cls.from_cells(staff_names, day_frame.columns, day_frame.to_numpy(dtype=object))
+
+    @classmethod
+    def from_cells(cls, staff_names, days, cells):
+        """Builds the cube from raw cell values, a (staff, days) array or flat in that order."""
+        per_cell, minutes = parse_punches(np.asarray(cells, dtype=object).ravel())
+        offsets = np.zeros(len(per_cell) + 1, dtype=np.uint32)
+        offsets[1:] = np.cumsum(per_cell)
+        return cls(list(staff_names), list(days), offsets, minutes)
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + self.minutes.nbytes
+
+    def punches(self, staff, day):
+        """Minutes since midnight of one staff member (row) on one DAY column (position)."""
+        cell = staff * len(self.days) + day
+        return self.minutes[self.offsets[cell]:self.offsets[cell + 1]]
+
+    def _count(self, hours, cells, low, high):
+        hits = cells[(hours >= low) & (hours <= high)]
+        counts = np.bincount(hits, minlength=len(self.offsets) - 1)
+        return counts.reshape(len(self.staff), len(self.days))
+
+    def day_counts(self):
+        """(resume, exits) count arrays of shape (staff, days)."""
+        cells = np.repeat(np.arange(len(self.offsets) - 1), np.diff(self.offsets))
+        hours = self.minutes // 60
+        return self._count(hours, cells, *RESUME_HOURS), self._count(hours, cells, *EXIT_HOURS)
+
+
+def fold_weekdays(days, resume, exits):
+    """
+    Folds (staff, days) count arrays onto weekdays: returns (weekdays, resume,
+    exits) where resume and exits have shape (weekdays, staff), in WEEKDAY_CYCLE order.
+    """
+    col_weekdays = np.array([DAY_TO_WEEKDAY[day] for day in days])
+    weekdays = [day for day in WEEKDAY_CYCLE if day in col_weekdays]
+    shape = (len(weekdays), resume.shape[0])
+    resume_wd = np.zeros(shape, dtype=np.int64)
+    exits_wd = np.zeros(shape, dtype=np.int64)
+    for i, day in enumerate(weekdays):
+        resume_wd[i] = resume[:, col_weekdays == day].sum(axis=1)
+        exits_wd[i] = exits[:, col_weekdays == day].sum(axis=1)
+    return weekdays, resume_wd, exits_wd
@@ -0,0 +1,188 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .punches import EXIT_HOURS, RESUME_HOURS
+
+logger = logging.getLogger(__name__)
+
+# Plain-text punch logs as the terminals export them next to the XLSX report:
+# one row per punch with the staff member and a timestamp. Either a CSV with
+# a header row, or the raw "attlog" dump (id, timestamp, device columns...,
+# tab separated, no header). They are read with pandas' C parser a chunk at a
+# time and counted straight into the per staff/DAY column arrays that
+# summarize_counts takes, so neither the 3-row XLSX layout nor punch strings
+# are ever parsed.
+CHUNK_ROWS = 200_000
+SNIFF_BYTES = 64 * 1024
+DAY_COUNT = 32
+SEPARATORS = ("\t", ",", ";", "|")
+
+# Header names (lowercased) recognised for each role, in order of preference
+NAME_COLUMNS = ("name", "staff", "staff name", "employee", "employee name", "full name")
+ID_COLUMNS = ("id", "staff id", "user id", "userid", "employee id", "emp id", "enroll id", "ac-no", "ac-no.", "no.")
+TIMESTAMP_COLUMNS = ("timestamp", "datetime", "date time", "date/time", "punch time", "check time", "checktime", "time")
+DATE_COLUMN = "date"
+TIME_COLUMN = "time"
+
+
+def _timestamps(values, dayfirst=False):
+    """
+    Parses punch timestamps; ISO 8601 on the fast path, else a format inferred
+    from the data, read day first when `dayfirst` (see _dayfirst).
+    """
+    stamps = pd.to_datetime(values, format="ISO8601", errors="coerce")
+    if stamps.isna().sum() > values.isna().sum():
+        stamps = pd.to_datetime(values, errors="coerce", dayfirst=dayfirst)
+    return stamps
+
+
+def _dayfirst(values, month_id=None):
+    """
+    Whether the sampled timestamps read as DD/MM rather than MM/DD: the
+    reading that puts more of them in `month_id` (YYYY-MM), else the one that
+    parses more of them. Month first wins a tie, e.g. for ISO 8601 stamps.
+    """
+    def score(dayfirst):
+        stamps = _timestamps(values, dayfirst)
+        in_month = stamps.dt.strftime("%Y-%m").eq(month_id) if month_id else stamps.notna()
+        return int(in_month.sum()), int(stamps.notna().sum())
+
+    return score(True) > score(False)
+
+
+def sniff_punch_log(f, month_id=None):
+    """
+    Works out the layout of a punch log from its first line: the separator,
+    whether there is a header row to skip and the positions of the staff and
+    timestamp column(s), and from the first lines whether dates are day first
+    (see _dayfirst), so every chunk is read the same way. Raises ValueError
+    when it does not look like a punch log.
+    """
+    head = f.read(SNIFF_BYTES)
+    f.seek(0)
+    truncated = len(head) == SNIFF_BYTES
+    if isinstance(head, bytes):
+        head = head.decode("utf-8", errors="replace")
+    lines = [line for line in head.lstrip("\ufeff").splitlines() if line.strip()]
+    if truncated and len(lines) > 1:
+        lines.pop()  # cut off mid-line
+    if not lines:
+        raise ValueError("The punch log is empty.")
+
+    first = lines[0]
+    sep = max(SEPARATORS, key=first.count)
+    fields = [field.strip().strip('"') for field in first.split(sep)]
+    lowered = [field.lower() for field in fields]
+
+    def find(candidates):
+        return next((lowered.index(name) for name in candidates if name in lowered), None)
+
+    staff = find(NAME_COLUMNS)
+    if staff is None:
+        staff = find(ID_COLUMNS)
+    if DATE_COLUMN in lowered and TIME_COLUMN in lowered:
+        times = [lowered.index(DATE_COLUMN), lowered.index(TIME_COLUMN)]
+    else:
+        timestamp = find(TIMESTAMP_COLUMNS)
+        times = [] if timestamp is None else [timestamp]
+    if staff is not None and times:
+        layout = {"sep": sep, "skiprows": 1, "staff": staff, "times": times}
+    elif len(fields) >= 2 and not pd.isna(_timestamps(pd.Series([fields[1]]))[0]):
+        # No header: the raw dump, staff id first and timestamp second
+        layout = {"sep": sep, "skiprows": 0, "staff": 0, "times": [1]}
+    else:
+        raise ValueError(
+            "Could not find a staff column and a timestamp column in the punch log "
+            f"(first line: {first[:80]!r})."
+        )
+
+    sample = []
+    for line in lines[layout["skiprows"]:]:
+        fields = [field.strip().strip('"') for field in line.split(sep)]
+        if len(fields) > max(layout["times"]):
+            sample.append(" ".join(fields[column] for column in layout["times"]))
+    layout["dayfirst"] = _dayfirst(pd.Series(sample, dtype=object), month_id)
+    return layout
+
+
+def check_punch_log(f):
+    """Cheap check of a text upload before it is queued; raises ValueError like check_workbook."""
+    sniff_punch_log(f)
+
+
+def read_punch_log(path, month_id=None, chunk_rows=CHUNK_ROWS):
+    """
+    Counts the resume and exit punches of a punch log per staff member and
+    day of the month. Punches outside `month_id` (YYYY-MM) are skipped when it
+    is given. Returns (staff_names, days, resume, exits) like count_columns:
+    DAY columns are the days that have punches, the arrays are (staff, days).
+    """
+    with open(path, "rb") as f:
+        layout = sniff_punch_log(f, month_id)
+    year, month = map(int, month_id.split("-")) if month_id else (None, None)
+
+    index = {}                     # staff -> row of the count arrays
+    resume = np.zeros(0, dtype=np.int64)
+    exits = np.zeros(0, dtype=np.int64)
+    seen_days = np.zeros(DAY_COUNT, dtype=bool)
+    rows = skipped = 0
+
+    reader = pd.read_csv(
+        path,
+        sep=layout["sep"],
+        header=None,
+        skiprows=layout["skiprows"],
+        usecols=[layout["staff"], *layout["times"]],
+        dtype=str,
+        skipinitialspace=True,
+        encoding="utf-8",
+        encoding_errors="replace",
+        on_bad_lines="skip",
+        chunksize=chunk_rows,
+    )
+    with reader:
+        for chunk in reader:
+            rows += len(chunk)
+            staff = chunk[layout["staff"]].str.strip()
+            times = chunk[layout["times"][0]]
+            for column in layout["times"][1:]:
+                times = times.str.cat(chunk[column], sep=" ")
+            stamps = _timestamps(times, layout["dayfirst"])
+
+            keep = stamps.notna() & staff.notna() & staff.ne("")
+            if year is not None:
+                keep &= (stamps.dt.year == year) & (stamps.dt.month == month)
+            skipped += int((~keep).sum())
+            staff, stamps = staff[keep], stamps[keep]
+            if staff.empty:
+                continue
+
+            # Chunk-local staff codes -> rows of the running count arrays
+            codes, uniques = pd.factorize(staff)
+            rows_of = np.array([index.setdefault(name, len(index)) for name in uniques], dtype=np.int64)
+            days = stamps.dt.day.to_numpy() - 1
+            hours = stamps.dt.hour.to_numpy()
+            cells = rows_of[codes] * DAY_COUNT + days
+            seen_days[np.unique(days)] = True
+
+            size = len(index) * DAY_COUNT
+            resume = np.pad(resume, (0, size - len(resume)))
+            exits = np.pad(exits, (0, size - len(exits)))
+            is_resume = (hours >= RESUME_HOURS[0]) & (hours <= RESUME_HOURS[1])
+            is_exit = (hours >= EXIT_HOURS[0]) & (hours <= EXIT_HOURS[1])
+            resume += np.bincount(cells[is_resume], minlength=size)
+            exits += np.bincount(cells[is_exit], minlength=size)
+
+    if skipped:
+        logger.warning("Punch log rows skipped", extra={"path": path, "rows": rows, "skipped": skipped})
+
+    day_columns = np.flatnonzero(seen_days)
+    shape = (len(index), DAY_COUNT)
+    return (
+        list(index),
+        [f"DAY{day + 1}" for day in day_columns],
+        resume.reshape(shape)[:, day_columns],
+        exits.reshape(shape)[:, day_columns],
+    )
@@ -0,0 +1,265 @@
+import hashlib
+import io
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+from .artifacts import release
+from .db import BatchWriter
+from .fragments import invalidate
+from .models import AttendanceFact, AttendanceResult, UploadedResult
+from .staff import intern_staff
+from .upload_cache import remember
+
+# Stored results are plain NumPy column arrays in an (uncompressed) .npz file:
+# loading one is a memcpy per column, no text parsing and no pickle. String
+# columns (Staff, Day) are dictionary-encoded as int32 codes + distinct values.
+# NumPy/pandas are imported by the functions that need them, so that looking
+# results up (get_result, the dashboard, the API) does not load them.
+COLUMNS_KEY = "__columns__"
+FACT_BATCH_SIZE = 2000
+
+
+def frame_to_bytes(df):
+    import numpy as np
+
+    arrays = {COLUMNS_KEY: np.array(df.columns, dtype=str)}
+    for i, col in enumerate(df.columns):
+        values = df[col].to_numpy()
+        if values.dtype == object:
+            uniques, codes = np.unique(values.astype(str), return_inverse=True)
+            arrays[f"c{i}_values"] = uniques
+            arrays[f"c{i}_codes"] = codes.astype(np.int32)
+        else:
+            arrays[f"c{i}"] = values
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def frame_from_file(f):
+    import numpy as np
+    import pandas as pd
+
+    with np.load(f, allow_pickle=False) as data:
+        columns = {}
+        for i, col in enumerate(data[COLUMNS_KEY]):
+            if f"c{i}_codes" in data:
+                values = data[f"c{i}_values"].astype(object)
+                columns[str(col)] = values[data[f"c{i}_codes"]]
+            else:
+                columns[str(col)] = data[f"c{i}"]
+        return pd.DataFrame(columns)
+
+
+def _prepare(month_id, daily_bytes, totals_bytes, report_data, snapshot_bytes=None, rollups_bytes=None):
+    """Writes a month's files to storage and returns an unsaved AttendanceResult for them."""
+    result = AttendanceResult(month_id=month_id, updated_at=timezone.now())
+    result.daily_file.save(f"{month_id}_daily.npz", ContentFile(daily_bytes), save=False)
+    result.totals_file.save(f"{month_id}_totals.npz", ContentFile(totals_bytes), save=False)
+    if snapshot_bytes:
+        result.snapshot_file.save(f"{month_id}_snapshot.npz", ContentFile(snapshot_bytes), save=False)
+    if rollups_bytes:
+        result.rollups_file.save(f"{month_id}_rollups.npz", ContentFile(rollups_bytes), save=False)
+    # Content address of this result, e.g. for chart files shared between months
+    digest = hashlib.sha256(daily_bytes)
+    digest.update(totals_bytes)
+    result.report_data = {**(report_data or {}), "digest": digest.hexdigest()}
+    return result
+
+
+def _facts(result, daily_bytes):
+    """AttendanceFact rows for a result, one per row of its daily summary."""
+    daily = frame_from_file(io.BytesIO(daily_bytes))
+    staff_ids = intern_staff(daily["Staff"].unique())
+    columns = ["Staff", "Day", "Resume Count", "Exit Count"]
+    return [
+        AttendanceFact(
+            attendance=result, month_id=result.month_id, staff_id=staff_ids[str(staff)], day=day,
+            resume_count=int(resume), exit_count=int(exits),
+        )
+        for staff, day, resume, exits in daily[columns].itertuples(index=False, name=None)
+    ]
+
+
+def _store_many(items):
+    """
+    Persists (month_id, daily_bytes, totals_bytes, report_data[, snapshot_bytes[, rollups_bytes[, upload]]])
+    items with one bulk upsert, replacing earlier results for those months. Returns {month_id: result}.
+    `upload` is the (dedup key, file name, size) of the upload an item was computed from, if any.
+    """
+    items = list({item[0]: item for item in items}.values())  # last one per month wins
+    months = [item[0] for item in items]
+    previous = list(AttendanceResult.objects.filter(month_id__in=months))
+    prepared = []
+    try:
+        for item in items:
+            prepared.append(_prepare(*item[:6]))
+        stored = _save(items, prepared)
+    except BaseException:
+        # A failed write (retried when the database was locked, db.py) leaves no files behind
+        _delete_files(prepared)
+        raise
+
+    _delete_files(previous)
+    for month_id in months:
+        release(month_id)
+        invalidate(month_id)
+    return stored
+
+
+def _delete_files(results):
+    for result in results:
+        for field in (result.daily_file, result.totals_file, result.snapshot_file, result.rollups_file):
+            if field:
+                field.storage.delete(field.name)
+
+
+def _save(items, prepared):
+    """Upserts the prepared results, their fact rows and dedup entries in one transaction; returns {month_id: result}."""
+    months = [item[0] for item in items]
+    with transaction.atomic():
+        AttendanceResult.objects.bulk_create(
+            prepared,
+            update_conflicts=True,
+            unique_fields=["month_id"],
+            update_fields=["daily_file", "totals_file", "snapshot_file", "rollups_file", "report_data", "updated_at"],
+        )
+        # The months now hold different content: drop dedup entries pointing at them
+        UploadedResult.objects.filter(attendance__month_id__in=months).delete()
+
+        # Replace the months' fact rows in the same transaction
+        stored = {result.month_id: result for result in AttendanceResult.objects.filter(month_id__in=months)}
+        AttendanceFact.objects.filter(month_id__in=months).delete()
+        AttendanceFact.objects.bulk_create(
+            [fact for item in items for fact in _facts(stored[item[0]], item[1])],
+            batch_size=FACT_BATCH_SIZE,
+        )
+        # ... and record the uploads they were computed from instead
+        for item in items:
+            if len(item) > 6 and item[6]:
+                remember(item[6][0], stored[item[0]], *item[6][1:])
+    return stored
+
+
+def _write_many(items):
+    stored = _store_many(items)
+    return [stored[item[0]] for item in items]
+
+
+# Results stored at the same time (e.g. a month-end burst of uploads) are
+# committed together by one writer thread (db.py)
+_writer = BatchWriter(_write_many, "result-writer")
+
+
+def _store(items):
+    """Stores items like _store_many on the writer thread; returns {month_id: result}."""
+    items = list(items)
+    return {item[0]: result for item, result in zip(items, _writer.write(items))}
+
+
+def _store_bytes(month_id, daily_bytes, totals_bytes, report_data, snapshot_bytes=None, rollups_bytes=None):
+    return _store([(month_id, daily_bytes, totals_bytes, report_data, snapshot_bytes, rollups_bytes)])[month_id]
+
+
+def _summary_item(month_id, daily_summary, staff_totals, snapshot=None, upload=None):
+    from .rollups import Rollups
+
+    # Rollups are computed here, once per stored result, for every later reader
+    return (
+        month_id,
+        frame_to_bytes(daily_summary),
+        frame_to_bytes(staff_totals),
+        {"staff": len(staff_totals), "daily_rows": len(daily_summary)},
+        snapshot,
+        Rollups.from_summary(daily_summary, staff_totals).to_bytes(),
+        upload,
+    )
+
+
+def store_result(month_id, daily_summary, staff_totals, snapshot=None, upload=None):
+    """
+    Persists one month's results, replacing any earlier upload for that month.
+    `snapshot` is the incremental snapshot file content (incremental.py), if any.
+    `upload` is (dedup key, file name, size) of the upload they were computed
+    from: its dedup cache entry is written with the result, and only if this
+    result is the one stored for the month.
+    """
+    return _store([_summary_item(month_id, daily_summary, staff_totals, snapshot, upload)])[month_id]
+
+
+def store_results(results):
+    """Bulk version of store_result for [(month_id, daily_summary, staff_totals, snapshot[, upload]), ...]."""
+    return _store([_summary_item(*result) for result in results])
+
+
+def copy_result(source, month_id):
+    """Stores an already computed result under another month, without re-parsing."""
+    if source.month_id == month_id:
+        return source
+    snapshot = None
+    if source.snapshot_file:
+        with source.snapshot_file.open("rb") as f:
+            snapshot = f.read()
+    rollups = load_rollups(source).to_bytes()
+    with source.daily_file.open("rb") as daily, source.totals_file.open("rb") as totals:
+        return _store_bytes(month_id, daily.read(), totals.read(), source.report_data, snapshot, rollups)
+
+
+def get_result(month_id):
+    """The month's AttendanceResult if it has stored reports, else None."""
+    result = AttendanceResult.objects.filter(month_id=month_id).first()
+    if result is None or not result.daily_file or not result.totals_file:
+        return None
+    return result
+
+
+def result_digest(result):
+    """Content digest of a stored result (computed from its files for older rows)."""
+    digest = (result.report_data or {}).get("digest")
+    if digest:
+        return digest
+    digest = hashlib.sha256()
+    for field in (result.daily_file, result.totals_file):
+        with field.open("rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def load_frame(result, which):
+    """Reads the "daily" or "totals" DataFrame of a stored result."""
+    field = result.daily_file if which == "daily" else result.totals_file
+    with field.open("rb") as f:
+        return frame_from_file(f)
+
+
+def load_rollups(result):
+    """The stored Rollups of a result (computed from its reports for results stored without)."""
+    from .rollups import Rollups
+
+    if result.rollups_file:
+        with result.rollups_file.open("rb") as f:
+            return Rollups.from_file(f)
+    return Rollups.from_summary(load_frame(result, "daily"), load_frame(result, "totals"))
+
+
+def load_report(month_id, which):
+    """
+    Returns the stored "daily" or "totals" DataFrame for a month,
+    or None when that month has not been processed.
+    """
+    result = get_result(month_id)
+    if result is None:
+        return None
+    return load_frame(result, which)
+
+
+# ----------------------------
+#  Derived artifacts (exports, charts) cached per stored result
+# ----------------------------
+def artifact_name(result, filename):
+    """Storage name for a file derived from this exact version of a result."""
+    version = result.updated_at.strftime("%Y%m%d%H%M%S%f")
+    return f"artifacts/{result.month_id}/{version}_{filename}"
+
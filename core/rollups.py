@@ -0,0 +1,84 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+# Aggregates the charts and the analytics page need, computed once when a
+# result is stored and saved next to it ({month}_rollups.npz, results.py):
+# the staff × weekday matrices of resume and exit counts, from which the
+# per-weekday totals and attendance %, and the per-staff totals and days
+# present, are plain sums. Nothing downstream groups or pivots the daily
+# summary again.
+
+
+class Rollups:
+    """
+    Precomputed aggregates of one result. `staff` and `weekdays` are sorted
+    like the groupby/pivot they replace; `resume` and `exits` are int64
+    arrays of shape (staff, weekdays); `staff_count` is the number of rows of
+    the staff totals, the denominator of the attendance %.
+    """
+
+    def __init__(self, staff, weekdays, resume, exits, staff_count):
+        self.staff = np.asarray(staff, dtype=object)
+        self.weekdays = np.asarray(weekdays, dtype=object)
+        self.resume = resume
+        self.exits = exits
+        self.staff_count = int(staff_count)
+
+    @classmethod
+    def from_summary(cls, daily_summary_df, staff_totals_df):
+        """Builds the rollups from a daily summary and staff totals, on integer codes."""
+        staff_codes, staff = pd.factorize(daily_summary_df["Staff"], sort=True)
+        day_codes, days = pd.factorize(daily_summary_df["Day"], sort=True)
+        keep = (staff_codes >= 0) & (day_codes >= 0)
+        matrices = []
+        for column in ("Resume Count", "Exit Count"):
+            matrix = np.zeros((len(staff), len(days)), dtype=np.int64)
+            matrix[staff_codes[keep], day_codes[keep]] = daily_summary_df[column].to_numpy()[keep]
+            matrices.append(matrix)
+        return cls(staff, days, *matrices, len(staff_totals_df))
+
+    def to_bytes(self):
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            staff=self.staff.astype(str),
+            weekdays=self.weekdays.astype(str),
+            resume=self.resume,
+            exits=self.exits,
+            staff_count=np.int64(self.staff_count),
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_file(cls, f):
+        with np.load(f, allow_pickle=False) as data:
+            return cls(data["staff"], data["weekdays"], data["resume"], data["exits"], data["staff_count"])
+
+    def weekday_resume(self):
+        """Resume punches per weekday, like daily_summary.groupby("Day")["Resume Count"].sum()."""
+        return pd.Series(self.resume.sum(axis=0), index=pd.Index(self.weekdays, name="Day"), name="Resume Count")
+
+    def weekday_percent(self):
+        """Attendance % per weekday: resume punches over the number of staff."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.weekday_resume() / self.staff_count * 100
+
+    def staff_matrix(self, values="Resume Count"):
+        """Staff × weekday matrix of "Resume Count" or "Exit Count"."""
+        matrix = self.resume if values == "Resume Count" else self.exits
+        return pd.DataFrame(
+            matrix, index=pd.Index(self.staff, name="Staff"), columns=pd.Index(self.weekdays, name="Day")
+        )
+
+    def staff_totals(self):
+        """Per-staff totals and days present, as in the stored staff totals."""
+        resume = self.resume.sum(axis=1)
+        exits = self.exits.sum(axis=1)
+        return pd.DataFrame({
+            "Staff": self.staff,
+            "Resume Count": resume,
+            "Exit Count": exits,
+            "Days Present": np.maximum(resume, exits),
+        })
@@ -0,0 +1,114 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Parsing the punch cells is almost all of extract_attendance_times' time and
+# each staff row is parsed on its own, so large rosters are cut into row
+# shards parsed and counted in worker processes. The per-row resume/exit
+# counts come back in shard order and are stacked before the one grouping per
+# staff member and weekday (summarize_counts): the result is the same as the
+# serial pass whatever order the shards finish in, including for staff names
+# that repeat across shards.
+_lock = threading.Lock()
+_pool = None
+_rows = None  # (staff_names, days, cells) inherited by forked shard workers
+
+
+def _shard_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            # For multi-threaded callers: spawn as in jobs.py. The workers only
+            # run NumPy, no Django setup.
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.AGGREGATE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shard_bounds(rows, workers=None):
+    """
+    (start, stop) row ranges to aggregate `rows` rows in: one per worker, none
+    smaller than AGGREGATE_SHARD_ROWS. A single range means the serial pass.
+    """
+    workers = settings.AGGREGATE_WORKERS if workers is None else workers
+    shards = max(1, min(workers, rows // settings.AGGREGATE_SHARD_ROWS))
+    edges = [rows * i // shards for i in range(shards + 1)]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _count_shard(staff_names, days, cells):
+    """Resume/exit counts of one shard's rows; runs in a worker process."""
+    from .punches import PunchCube
+
+    return PunchCube.from_cells(staff_names, days, cells).day_counts()
+
+
+def _count_rows(start, stop):
+    staff_names, days, cells = _rows
+    return _count_shard(staff_names[start:stop], days, cells[start:stop])
+
+
+def _count_parts(staff_names, days, cells, bounds):
+    """Counts of each shard, in shard order (not completion order)."""
+    global _rows
+    if threading.active_count() == 1 and "fork" in multiprocessing.get_all_start_methods():
+        # Single-threaded callers (upload workers, management commands) fork
+        # their shard workers, which inherit the cells instead of being sent a
+        # pickled copy: pickling object arrays would be serial work here.
+        _rows = (staff_names, days, cells)
+        try:
+            with ProcessPoolExecutor(max_workers=len(bounds), mp_context=multiprocessing.get_context("fork")) as pool:
+                return list(pool.map(_count_rows, *zip(*bounds)))
+        finally:
+            _rows = None
+
+    pool = _shard_pool()
+    try:
+        futures = [
+            pool.submit(_count_shard, staff_names[start:stop], days, cells[start:stop])
+            for start, stop in bounds
+        ]
+        return [future.result() for future in futures]
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+
+
+def day_counts(day_frame, staff_names, workers=None):
+    """
+    Resume and exit counts of shape (staff, days) for a DAY frame lined up
+    with `staff_names` (PunchCube.prepare_frame), like PunchCube.day_counts.
+    Rosters of several shards are counted in parallel, see shard_bounds.
+    """
+    import numpy as np
+
+    days = list(day_frame.columns)
+    staff_names = list(staff_names)
+    bounds = shard_bounds(len(day_frame), workers)
+    cells = day_frame.to_numpy(dtype=object)
+    if len(bounds) == 1:
+        return _count_shard(staff_names, days, cells)
+
+    try:
+        parts = _count_parts(staff_names, days, cells, bounds)
+    except BrokenProcessPool:
+        logger.warning("Shard workers died, counting serially", extra={"rows": len(day_frame), "shards": len(bounds)})
+        return _count_shard(staff_names, days, cells)
+    logger.debug("Sharded counts", extra={"rows": len(day_frame), "shards": len(bounds)})
+    return tuple(np.concatenate([part[i] for part in parts]) for i in range(2))
@@ -0,0 +1,24 @@
+from .models import Staff
+
+# SQLite caps the number of variables per query, so names go in batches
+NAME_BATCH_SIZE = 500
+
+
+def _known_ids(names):
+    ids = {}
+    for start in range(0, len(names), NAME_BATCH_SIZE):
+        batch = names[start:start + NAME_BATCH_SIZE]
+        ids.update(Staff.objects.filter(name__in=batch).values_list("name", "id"))
+    return ids
+
+
+def intern_staff(names):
+    """Returns {name: staff id} for the given names, registering the new ones."""
+    names = sorted({str(name) for name in names})
+    ids = _known_ids(names)
+    missing = [name for name in names if name not in ids]
+    if missing:
+        # ignore_conflicts: a concurrent upload may register the same names
+        Staff.objects.bulk_create([Staff(name=name) for name in missing], ignore_conflicts=True)
+        ids.update(_known_ids(missing))
+    return ids
@@ -0,0 +1,96 @@
+import calendar
+import csv
+import random
+
+import openpyxl
+
+# Synthetic attendance-device exports with the "Logs"/"Summary" layout the
+# dashboard reads (see workbook.py), or as a CSV punch log (punchlog.py), for
+# benchmarks and load tests.
+FIRST_NAMES = ["Ama", "Kofi", "Esi", "Yaw", "Akua", "Kwame", "Abena", "Kojo", "Efua", "Kwesi"]
+LAST_NAMES = ["Mensah", "Owusu", "Boateng", "Asante", "Osei", "Addo", "Appiah", "Darko"]
+
+
+def _punch(rng, hour_low, hour_high):
+    return f"{rng.randint(hour_low, hour_high):02d}:{rng.randint(0, 59):02d}"
+
+
+def _day_cell(rng, punches, absent_rate):
+    """One staff member's punches for a day, e.g. '07:4212:3116:58', or None."""
+    if rng.random() < absent_rate:
+        return None
+    count = max(1, min(punches * 2, round(rng.gauss(punches, 1))))
+    times = [_punch(rng, 7, 9)]
+    if count > 1:
+        times.append(_punch(rng, 16, 19))
+    # Extra punches fall during the day (lunch, errands), a few are stray
+    for _ in range(count - len(times)):
+        times.append(_punch(rng, 10, 15) if rng.random() < 0.9 else _punch(rng, 0, 23))
+    cell = "".join(sorted(times))
+    # Some devices wrap long cells
+    if rng.random() < 0.02:
+        cell = cell[:10] + "\n" + cell[10:]
+    return cell
+
+
+def _staff_days(rng, staff, days, punches, absent_rate):
+    """Yields (name, [day cell, ...]) per staff member."""
+    for s in range(staff):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {s + 1}"
+        yield name, [_day_cell(rng, punches, absent_rate) for _ in range(days)]
+
+
+def make_workbook(path, staff=100, days=31, punches=2, seed=0, absent_rate=0.1):
+    """
+    Writes a synthetic export for `staff` people over `days` days with about
+    `punches` punches per present day. `path` may be a file name or a binary file object.
+    """
+    rng = random.Random(seed)
+    wb = openpyxl.Workbook(write_only=True)
+
+    logs = wb.create_sheet("Logs")
+    logs.append(["Attendance Record Report"])
+    logs.append(["Att. Time", f"1 ~ {days}"])
+    logs.append(list(range(1, days + 1)))
+    logs.append([])
+    names = []
+    for s, (name, cells) in enumerate(_staff_days(rng, staff, days, punches, absent_rate)):
+        names.append(name)
+        logs.append(["ID:", s + 1, "Name:", name, "Dept.:", "Office"])
+        logs.append(cells)
+        logs.append([])
+
+    summary = wb.create_sheet("Summary")
+    summary.append(["Attendance Summary Report"])
+    summary.append(["Stat. Date", f"1 ~ {days}"])
+    summary.append(["ID", "Name", "Dept.", "Normal", "Absent"])
+    summary.append([None, None, None, "Days", "Days"])
+    for s, name in enumerate(names):
+        summary.append([s + 1, name, "Office", None, None])
+
+    wb.save(path)
+
+
+def make_punch_log(path, staff=100, days=31, punches=2, seed=0, absent_rate=0.1, month="2024-01"):
+    """
+    Writes the same punches as make_workbook(..., seed) as a CSV punch log,
+    one "ID,Name,Timestamp" row per punch, DAY n being day n of `month`.
+    `path` may be a file name or a text file object.
+    """
+    year, month_number = map(int, month.split("-"))
+    if days > calendar.monthrange(year, month_number)[1]:
+        raise ValueError(f"{month} has fewer than {days} days.")
+    rng = random.Random(seed)
+
+    f = open(path, "w", newline="") if isinstance(path, str) else path
+    try:
+        writer = csv.writer(f)
+        writer.writerow(["ID", "Name", "Timestamp"])
+        for s, (name, cells) in enumerate(_staff_days(rng, staff, days, punches, absent_rate)):
+            for day, cell in enumerate(cells, start=1):
+                cell = (cell or "").replace("\n", "")
+                for i in range(0, len(cell), 5):
+                    writer.writerow([s + 1, name, f"{year}-{month_number:02d}-{day:02d} {cell[i:i + 5]}:00"])
+    finally:
+        if f is not path:
+            f.close()
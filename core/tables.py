@@ -0,0 +1,57 @@
+from urllib.parse import urlencode
+
+from django.core.paginator import Paginator
+
+PAGE_SIZES = (25, 50, 100, 200)
+DEFAULT_PAGE_SIZE = 50
+# Query params page_report reads, i.e. everything a rendered page depends on
+REPORT_PAGE_PARAMS = ("staff", "day", "sort", "order", "per_page", "page", "month")
+
+
+def page_report(report, params, filter_day=False):
+    """
+    Filters, sorts and slices a stored report for one page of a table view.
+    Reads staff/day/sort/order/per_page/page from the query params and
+    returns (rows_df, table) where `table` carries the context for the pager.
+    """
+    staff = params.get("staff", "").strip()
+    if staff:
+        report = report[report["Staff"].astype(str).str.contains(staff, case=False, regex=False)]
+
+    day = params.get("day", "") if filter_day else ""
+    if day:
+        report = report[report["Day"] == day]
+
+    sort = params.get("sort", "")
+    order = "desc" if params.get("order") == "desc" else "asc"
+    if sort in report.columns:
+        report = report.sort_values(sort, ascending=order == "asc", kind="stable")
+    else:
+        sort = ""
+
+    try:
+        per_page = int(params.get("per_page", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        per_page = DEFAULT_PAGE_SIZE
+    if per_page not in PAGE_SIZES:
+        per_page = DEFAULT_PAGE_SIZE
+
+    # Paginate row positions only; the frame itself is sliced once
+    page = Paginator(range(len(report)), per_page).get_page(params.get("page"))
+    rows = report.iloc[page.object_list.start:page.object_list.stop]
+
+    query = {"staff": staff, "day": day, "sort": sort, "order": order, "per_page": per_page}
+    if params.get("month"):
+        query["month"] = params["month"]
+    table = {
+        "page": page,
+        "columns": list(report.columns),
+        "staff": staff,
+        "day": day,
+        "sort": sort,
+        "order": order,
+        "per_page": per_page,
+        "page_sizes": PAGE_SIZES,
+        "query": urlencode({k: v for k, v in query.items() if v}),
+    }
+    return rows, table
@@ -1,3 +1,317 @@
-from django.test import TestCase
+import json
+import os
+import subprocess
+import sys
 
-# Create your tests here.
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+
+# Scientific stack that web workers and management commands must not load at
+# startup; each code path imports what it needs on first use.
+HEAVY_MODULES = ("numpy", "pandas", "matplotlib", "seaborn", "openpyxl")
+# Wall time for django.setup() plus the URLconf (every view module) in a
+# fresh interpreter; with the heavy modules loaded eagerly it was ~1.6s
+STARTUP_BUDGET_SECONDS = 1.0
+
+
+def _run(code):
+    """Runs `code` after django.setup() in a fresh interpreter, returns its JSON output."""
+    script = (
+        "import json, sys, time\n"
+        "started = time.perf_counter()\n"
+        "import django\n"
+        "django.setup()\n"
+        f"{code}\n"
+        "print(json.dumps({'seconds': time.perf_counter() - started, 'modules': sorted(sys.modules)}))\n"
+    )
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "provost_soft.settings")}
+    out = subprocess.run(
+        [sys.executable, "-c", script], cwd=settings.BASE_DIR, env=env,
+        capture_output=True, text=True, check=True, timeout=120,
+    )
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+def _loaded(modules, names):
+    return [name for name in names if name in modules]
+
+
+class StartupImportTests(SimpleTestCase):
+    def test_web_startup_skips_heavy_modules(self):
+        result = _run("import provost_soft.urls")
+        self.assertEqual(_loaded(result["modules"], HEAVY_MODULES), [])
+
+    def test_web_startup_within_budget(self):
+        result = _run("import provost_soft.urls")
+        self.assertLess(result["seconds"], STARTUP_BUDGET_SECONDS)
+
+    def test_parsing_skips_plotting(self):
+        # Upload workers parse and aggregate; they only load matplotlib to draw charts
+        result = _run("from core import code, incremental, jobs, punchlog, workbook")
+        self.assertEqual(_loaded(result["modules"], ("matplotlib", "seaborn", "openpyxl")), [])
+
+
+def _baseline_extract(final_df, staff_names):
+    """extract_attendance_times as it was before the vectorized parser, frozen for the parity tests."""
+    import pandas as pd
+
+    final_df.columns = [col.strip().upper() for col in final_df.columns]
+    weekday_cycle = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+    day_to_weekday = {f'DAY{i}': weekday_cycle[(i - 1) % 5] for i in range(1, 33)}
+
+    def split_time_chunks(text):
+        cleaned = str(text).replace(" ", "").replace("\n", "")
+        return [
+            cleaned[i:i+5] for i in range(0, len(cleaned), 5)
+            if len(cleaned[i:i+5]) == 5 and ':' in cleaned[i:i+5]
+        ]
+
+    if len(final_df) != len(staff_names):
+        min_len = min(len(staff_names), len(final_df))
+        final_df = final_df.iloc[:min_len]
+        staff_names = staff_names[:min_len]
+
+    summary_data = {"Staff": [], "Day": [], "Resume Count": [], "Exit Count": []}
+    for col in final_df.columns:
+        weekday = day_to_weekday.get(col)
+        if weekday is None:
+            continue
+        for idx, cell in enumerate(final_df[col]):
+            resume_count = 0
+            exit_count = 0
+            for time in split_time_chunks(cell):
+                try:
+                    hour = int(time[:2])
+                    if 7 <= hour <= 9:
+                        resume_count += 1
+                    elif 16 <= hour <= 19:
+                        exit_count += 1
+                except (ValueError, TypeError):
+                    continue
+            summary_data["Staff"].append(staff_names.iloc[idx] if isinstance(staff_names, pd.Series) else staff_names[idx])
+            summary_data["Day"].append(weekday)
+            summary_data["Resume Count"].append(resume_count)
+            summary_data["Exit Count"].append(exit_count)
+
+    daily_summary_df = (
+        pd.DataFrame(summary_data).groupby(["Staff", "Day"], as_index=False)
+        .sum()
+        .sort_values(["Staff", "Day"])
+        .reset_index(drop=True)
+    )
+    staff_totals_df = daily_summary_df.groupby("Staff", as_index=False).agg({"Resume Count": "sum", "Exit Count": "sum"})
+    staff_totals_df["Days Present"] = staff_totals_df.apply(
+        lambda row: max(row["Resume Count"], row["Exit Count"]), axis=1
+    )
+    staff_totals_df = staff_totals_df.sort_values("Staff").reset_index(drop=True)
+    return daily_summary_df, staff_totals_df
+
+
+# Cells the device exports and a few it shouldn't: blanks, stray spaces and
+# newlines, signed and non-ASCII hours, cut-off chunks and one very long cell
+PARITY_CELLS = [
+    "07:5512:1016:45", float("nan"), "", " 08:10\n17:30", "+8:0017:00", "-1:0007:15",
+    "07:5x16:4", "٠٨:1518:00", "12:00", 7, "nan", "09:00" * 400 + "17:45", "7:0016:00", "19:5920:00",
+]
+
+
+class PunchParsingParityTests(SimpleTestCase):
+    def test_matches_baseline_loop(self):
+        import pandas as pd
+
+        from core.code import extract_attendance_times
+
+        rows = len(PARITY_CELLS)
+        frame = pd.DataFrame({
+            f"DAY{day}": [PARITY_CELLS[(row * 3 + day) % rows] for row in range(rows)] for day in range(1, 11)
+        }, dtype=object)
+        names = [f"Staff {row % 9}" for row in range(rows)]
+
+        expected = _baseline_extract(frame.copy(), names)
+        actual = extract_attendance_times(frame.copy(), names, workers=1)
+        for want, got in zip(expected, actual):
+            pd.testing.assert_frame_equal(got, want)
+
+
+class WorkbookLoaderParityTests(SimpleTestCase):
+    def test_matches_read_excel_and_new_attendance(self):
+        import io
+
+        import pandas as pd
+
+        from core.code import extract_attendance_times, new_attendance
+        from core.synthetic import make_workbook
+        from core.workbook import load_attendance_workbook
+
+        for staff, days in ((40, 31), (15, 12), (1, 3)):
+            buffer = io.BytesIO()
+            make_workbook(buffer, staff=staff, days=days, seed=staff)
+            data = buffer.getvalue()
+
+            # The dashboard's original two read_excel calls
+            records = new_attendance(pd.read_excel(io.BytesIO(data), sheet_name="Logs"))
+            summary = pd.read_excel(io.BytesIO(data), sheet_name="Summary")
+            names = summary.iloc[3:, 1].reset_index(drop=True)
+
+            cleaned_df, staff_names = load_attendance_workbook(io.BytesIO(data))
+            self.assertEqual(list(cleaned_df.columns), list(records.columns))
+            self.assertEqual(staff_names.tolist(), names.tolist())
+            expected = _baseline_extract(records, names)
+            for want, got in zip(expected, extract_attendance_times(cleaned_df, staff_names)):
+                pd.testing.assert_frame_equal(got, want)
+
+
+class IncrementalCountsParityTests(SimpleTestCase):
+    def test_snapshot_reuse_matches_full_parse(self):
+        import io
+        import tempfile
+
+        import numpy as np
+
+        from core.incremental import count_columns, load_snapshot
+        from core.synthetic import make_workbook
+        from core.workbook import load_attendance_workbook
+
+        buffer = io.BytesIO()
+        make_workbook(buffer, staff=60, days=31, seed=3)
+        buffer.seek(0)
+        cleaned_df, names = load_attendance_workbook(buffer)
+        full = count_columns(cleaned_df.copy(), names)
+        self.assertEqual(full[5], len(full[1]))
+
+        # An earlier upload of the month, up to DAY20, then one edited cell
+        early = cleaned_df[[f"DAY{day}" for day in range(1, 21)]]
+        edited = cleaned_df.copy()
+        edited.iloc[7, 4] = "07:1017:20"
+        with tempfile.TemporaryDirectory() as tmp:
+            snapshot_path = os.path.join(tmp, "snapshot.npz")
+            with open(snapshot_path, "wb") as f:
+                f.write(count_columns(early.copy(), names)[4])
+            snapshot = load_snapshot(snapshot_path)
+        for frame, parsed in ((cleaned_df, len(full[1]) - 20), (edited, len(full[1]) - 19)):
+            with self.subTest(parsed=parsed):
+                incremental = count_columns(frame.copy(), names, snapshot)
+                fresh = count_columns(frame.copy(), names)
+                self.assertEqual(incremental[5], parsed)
+                self.assertEqual(incremental[1], fresh[1])
+                np.testing.assert_array_equal(incremental[2], fresh[2])
+                np.testing.assert_array_equal(incremental[3], fresh[3])
+
+
+class ShardedAggregationTests(SimpleTestCase):
+    @override_settings(AGGREGATE_SHARD_ROWS=50)
+    def test_sharded_matches_serial(self):
+        import io
+
+        import pandas as pd
+
+        from core.code import extract_attendance_times
+        from core.synthetic import make_workbook
+        from core.workbook import load_attendance_workbook
+
+        buffer = io.BytesIO()
+        make_workbook(buffer, staff=230, seed=7)
+        buffer.seek(0)
+        cleaned_df, names = load_attendance_workbook(buffer)
+        # Names repeated across shards and a blank one are grouped like the serial pass does
+        names = list(names)
+        names[-1], names[120], names[3] = names[0], names[1], ""
+
+        serial = extract_attendance_times(cleaned_df.copy(), names, workers=1)
+        sharded = extract_attendance_times(cleaned_df.copy(), names, workers=4)
+        for expected, actual in zip(serial, sharded):
+            pd.testing.assert_frame_equal(actual, expected)
+
+
+class DashboardUploadCsrfTests(SimpleTestCase):
+    def _post(self, data, token=None):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.middleware.csrf import _get_new_csrf_string
+        from django.test import Client
+
+        client = Client(enforce_csrf_checks=True)
+        cookie = _get_new_csrf_string()
+        client.cookies[settings.CSRF_COOKIE_NAME] = cookie
+        form = {"month_id": "2024-01", "my_record": SimpleUploadedFile("log.csv", data)}
+        if token is not None:
+            form["csrfmiddlewaretoken"] = cookie if token else _get_new_csrf_string()
+        return client.post("/dashboard/", form, HTTP_ACCEPT="application/json")
+
+    def test_upload_handler_runs_with_csrf_enforced(self):
+        # The view's own upload handler rejects the file, after the CSRF check passed
+        response = self._post(b"\x00\x01 not a workbook", token=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("not an Excel workbook", response.json()["error"])
+
+    def test_upload_without_valid_token_is_forbidden(self):
+        self.assertEqual(self._post(b"\x00", token=None).status_code, 403)
+        self.assertEqual(self._post(b"\x00", token=False).status_code, 403)
+
+
+class PunchLogDateOrderTests(SimpleTestCase):
+    def test_day_first_log_read_in_its_month(self):
+        import tempfile
+
+        from core.punchlog import read_punch_log
+
+        # 01/05 .. 12/05 also read as valid month-first dates (January .. December)
+        lines = ["Name,Timestamp\n"]
+        for day in range(1, 13):
+            lines += [f"Ann,{day:02d}/05/2024 08:05\n", f"Ann,{day:02d}/05/2024 17:10\n"]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "punches.csv")
+            with open(path, "w") as f:
+                f.writelines(lines)
+            for chunk_rows in (200_000, 5):
+                with self.subTest(chunk_rows=chunk_rows):
+                    names, days, resume, exits = read_punch_log(path, "2024-05", chunk_rows=chunk_rows)
+                    self.assertEqual(names, ["Ann"])
+                    self.assertEqual(days, [f"DAY{day}" for day in range(1, 13)])
+                    self.assertEqual(resume.tolist(), [[1] * 12])
+                    self.assertEqual(exits.tolist(), [[1] * 12])
+
+
+class ImportDuplicateMonthTests(TestCase):
+    def test_one_file_per_month_is_stored_and_remembered(self):
+        import io
+        import tempfile
+
+        from django.core.management import call_command
+
+        from core.models import AttendanceResult, UploadedResult
+        from core.synthetic import make_workbook
+
+        with tempfile.TemporaryDirectory() as tmp, override_settings(MEDIA_ROOT=os.path.join(tmp, "media")):
+            source = os.path.join(tmp, "source")
+            os.makedirs(source)
+            for name, staff in (("att_2024-05.xlsx", 10), ("att_2024-05_fixed.xlsx", 12), ("att_2024-06.xlsx", 8)):
+                make_workbook(os.path.join(source, name), staff=staff, days=5, seed=staff)
+            out, err = io.StringIO(), io.StringIO()
+            call_command("import_attendance", source, workers=2, stdout=out, stderr=err)
+
+            self.assertIn("Imported 2 month(s)", out.getvalue())
+            self.assertIn("att_2024-05.xlsx: skipped, 2024-05 is imported from att_2024-05_fixed.xlsx", err.getvalue())
+            may = AttendanceResult.objects.get(month_id="2024-05")
+            self.assertEqual(may.report_data["staff"], 12)
+            self.assertEqual(
+                sorted(UploadedResult.objects.values_list("file", "attendance__month_id")),
+                [("att_2024-05_fixed.xlsx", "2024-05"), ("att_2024-06.xlsx", "2024-06")],
+            )
+
+
+class MonthValidationTests(SimpleTestCase):
+    def test_dashboard_rejects_months_outside_the_calendar(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        for month_id in ("2024-13", "0000-00", "2024-1"):
+            with self.subTest(month_id=month_id):
+                form = {"month_id": month_id, "my_record": SimpleUploadedFile("log.csv", b"Name,Timestamp\n")}
+                response = self.client.post("/dashboard/", form, HTTP_ACCEPT="application/json")
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("Invalid month", response.json()["error"])
+
+    def test_trend_ranges_reject_months_outside_the_calendar(self):
+        for query in ("from=2024-13", "to=0000-00"):
+            with self.subTest(query=query):
+                response = self.client.get(f"/api/trend/months/?{query}")
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,66 @@
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import UploadedResult
+
+
+def hash_upload(uploaded_file):
+    """SHA-256 of an upload, computed chunk by chunk as Django hands it over."""
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def cache_key(digest, month_id, workbook=True):
+    """
+    Dedup key of an upload with SHA-256 `digest`. A workbook gives the same
+    results whatever month it is uploaded as; a punch log only counts the
+    punches of that month, so its key includes the month.
+    """
+    if workbook:
+        return digest
+    return hashlib.sha256(f"{digest}:{month_id}".encode()).hexdigest()
+
+
+def lookup(digest):
+    """Returns the cached entry for a workbook digest, or None on a miss."""
+    oldest = timezone.now() - timedelta(seconds=settings.UPLOAD_CACHE_MAX_AGE)
+    entry = (
+        UploadedResult.objects.select_related("attendance")
+        .filter(result_id=digest, attendance__isnull=False, last_used__gte=oldest)
+        .first()
+    )
+    if entry is None:
+        return None
+    UploadedResult.objects.filter(pk=entry.pk).update(hits=F("hits") + 1, last_used=timezone.now())
+    return entry
+
+
+def remember(digest, attendance, upload_name="", size=0):
+    """Records that a workbook digest produced `attendance`, then evicts."""
+    UploadedResult.objects.update_or_create(
+        result_id=digest,
+        defaults={
+            "attendance": attendance,
+            "file": upload_name,
+            "size": size,
+            "last_used": timezone.now(),
+        },
+    )
+    evict()
+
+
+def evict():
+    """Drops entries older than UPLOAD_CACHE_MAX_AGE and beyond UPLOAD_CACHE_MAX_ENTRIES."""
+    oldest = timezone.now() - timedelta(seconds=settings.UPLOAD_CACHE_MAX_AGE)
+    UploadedResult.objects.filter(last_used__lt=oldest).delete()
+    stale = UploadedResult.objects.order_by("-last_used").values_list("pk", flat=True)[
+        settings.UPLOAD_CACHE_MAX_ENTRIES:
+    ]
+    UploadedResult.objects.filter(pk__in=list(stale)).delete()
@@ -0,0 +1,62 @@
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+
+from .workbook import ZIP_MAGIC, check_workbook
+
+FORM_OVERHEAD = 64 * 1024  # room for the other form fields and multipart framing
+
+
+class WorkbookUploadHandler(TemporaryFileUploadHandler):
+    """
+    Streams an uploaded workbook or CSV punch log straight to a temp file,
+    hashing it on the way (`upload.sha256`; `upload.punch_log` tells the two
+    apart), and rejects it as soon as it is too large (UPLOAD_MAX_BYTES), is
+    neither a zip file nor text, or lacks the "Logs"/"Summary" sheets or the
+    staff/timestamp columns. Rejected files are left out of request.FILES and
+    the reason is kept in request.upload_errors[field_name].
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.request.upload_errors = {}
+        self.request_too_large = content_length > settings.UPLOAD_MAX_BYTES + FORM_OVERHEAD
+
+    def _reject(self, message):
+        # The parser closes (and so deletes) the temp file of a skipped upload
+        self.request.upload_errors[self.field_name] = message
+        raise SkipFile()
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.digest = hashlib.sha256()
+        self.punch_log = False
+        if self.request_too_large or (self.content_length or 0) > settings.UPLOAD_MAX_BYTES:
+            self._reject(f"The file is larger than {settings.UPLOAD_MAX_BYTES // (1024 * 1024)} MB.")
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0:
+            self.punch_log = not raw_data.startswith(ZIP_MAGIC)
+            if self.punch_log and b"\x00" in raw_data:
+                self._reject("The file is not an Excel workbook (.xlsx) or a CSV punch log.")
+        if start + len(raw_data) > settings.UPLOAD_MAX_BYTES:
+            self._reject(f"The file is larger than {settings.UPLOAD_MAX_BYTES // (1024 * 1024)} MB.")
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        try:
+            if self.punch_log:
+                from .punchlog import check_punch_log  # pandas, only for text uploads
+
+                check_punch_log(upload)
+            else:
+                check_workbook(upload)
+        except ValueError as e:
+            self.request.upload_errors[self.field_name] = str(e)
+            upload.close()
+            return None
+        upload.sha256 = self.digest.hexdigest()
+        upload.punch_log = self.punch_log
+        return upload
@@ -1,5 +1,5 @@
-from . import views
-from django.urls import path
+from . import api, views
+from django.urls import path, re_path
 from django.contrib.auth import views as auth_views
 from .views import CustomLoginView, CustomLogoutView
 from django.views.generic import TemplateView
@@ -11,9 +11,21 @@ urlpatterns = [
     path('', TemplateView.as_view(template_name='home.html'), name='home'),
     path('home/', views.home, name='home'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/status/<int:job_id>/', views.upload_status, name='upload_status'),
     path('daily/', views.daily, name='daily'),
     path('monthly/', views.monthly, name='monthly'),
+    path('analytics/', views.analytics, name='analytics'),
+    path('analytics/charts/', views.analytics_charts, name='analytics_charts'),
     path('download_results/', views.download_results, name='download_results'),
     path('download_monthly_results/', views.download_monthly_results, name='download_monthly_results'),
+    path('api/trend/staff/', views.staff_trend, name='staff_trend'),
+    path('api/trend/months/', views.monthly_trend, name='monthly_trend'),
+    path('api/trend/year-over-year/', views.year_over_year, name='year_over_year'),
+    path('metrics', views.metrics_view, name='metrics'),
+    path('api/months/', api.MonthListView.as_view(), name='api_months'),
+    re_path(
+        r'^api/months/(?P<month_id>\d{4}-\d{2})/(?P<report>staff-totals|daily-summary)/$',
+        api.ReportView.as_view(), name='api_report',
+    ),
 
 ]
\ No newline at end of file
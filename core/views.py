@@ -1,18 +1,28 @@
-from django.shortcuts import render
+from django.shortcuts import redirect, render
 from .forms import CustomAuthenticationForm
 from django.contrib.auth.views import LoginView, LogoutView
-from django.urls import reverse_lazy
-import pandas as pd
-from .code import new_attendance, extract_attendance_times
-import tempfile
-from django.http import HttpResponse
-import io
-import json
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from . import facts, metrics
+from .jobs import enqueue_upload, recover_job
+from .models import UploadJob
+from .offload import aiter_blocking, aiter_file, run_blocking, upload_slot
+from .charts import get_charts
+from .exports import XLSX_CONTENT_TYPE, iter_csv, xlsx_artifact
+from .fragments import cached_fragment
+from .results import copy_result, get_result, load_frame, load_rollups
+from .tables import REPORT_PAGE_PARAMS, page_report
+from .upload_cache import cache_key, lookup
+from .uploads import WorkbookUploadHandler
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.views.decorators.csrf import csrf_exempt
+import logging
+import re
 import os
-import matplotlib.pyplot as plt
-import base64
-import openpyxl
+from datetime import datetime
 
+logger = logging.getLogger(__name__)
 
 # Create your views here.
 def home(request):
@@ -40,182 +50,323 @@ class CustomLoginView(LoginView):
 class CustomLogoutView(LogoutView):
     next_page = reverse_lazy('login')  # or rely on LOGOUT_REDIRECT_URL in settings
 
-def dashboard(request):
+MONTH_ID_RE = re.compile(r"^\d{4}-\d{2}$")
+
+
+def _check_month(month_id):
+    """Raises ValueError unless `month_id` is a real month written YYYY-MM."""
+    try:
+        if not MONTH_ID_RE.match(month_id):
+            raise ValueError
+        datetime.strptime(month_id, "%Y-%m")
+    except ValueError:
+        raise ValueError(f"Invalid month '{month_id}', expected YYYY-MM.") from None
+
+
+def _requested_month(request):
+    # An explicit ?month=YYYY-MM wins over the month last uploaded in this session
+    return request.GET.get("month") or request.session.get("month_id")
+
+
+async def _arequested_month(request):
+    return request.GET.get("month") or await request.session.aget("month_id")
+
+
+def _summary_tables(month_id):
+    result = get_result(month_id)
+    if result is None:
+        return "", ""
+    return cached_fragment(result, "summary_tables", (), lambda: _render_summary_tables(result))
+
+
+def _render_summary_tables(result):
+    with metrics.stage("load_report"):
+        daily_summary = load_frame(result, "daily")
+        staff_totals = load_frame(result, "totals")
+
+    # Generate HTML tables with Bootstrap classes
+    with metrics.stage("to_html"):
+        daily_table_html = daily_summary.to_html(
+            classes="table table-striped table-bordered table-hover",
+            index=False,
+            border=0
+        )
+        totals_table_html = staff_totals.to_html(
+            classes="table table-striped table-bordered table-hover",
+            index=False,
+            border=0
+        )
+    return daily_table_html, totals_table_html
+
+
+def _csrf_failure(request):
+    """The CSRF middleware's check, for views that must run it themselves: the 403 response, or None."""
+    return CsrfViewMiddleware(lambda request: None).process_view(request, None, (), {})
+
+
+# The CSRF middleware would read request.POST, and so parse the upload, before
+# the view installs its upload handler; the view checks the token itself once
+# the body has been parsed (see Django's "Modifying upload handlers on the fly")
+@csrf_exempt
+async def dashboard(request):
     # Initialize variables to avoid UnboundLocalError
     daily_table_html = ""
     totals_table_html = ""
     error_message = None
+    job = None
 
     if request.method == "POST":
         try:
-            # Upload Excel file
-            new_record = request.FILES["my_record"]
-
-            # Read sheets
-            df_record = pd.read_excel(new_record, sheet_name="Logs")
-            df_names = pd.read_excel(new_record, sheet_name="Summary")
-            df_names['number'] = range(1, len(df_names) + 1)
-            scor = df_names.loc[df_names['number'] > 3]
-            names = scor['Unnamed: 1']
-
-            # Process data
-            cleaned_df = new_attendance(df_record)
-            daily_summary, staff_totals = extract_attendance_times(cleaned_df, names)
-
-            # Optional: print for debugging
-            print(daily_summary.head(5))
-            print(staff_totals.head(5))
-
-            # Save JSON for session if needed
-            tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".json")
-            staff_totals.to_json(tmp_file, orient="split")
-            tmp_file.close()
-            request.session["cleaned_totals"] = tmp_file.name
-
-            tmp_fil = tempfile.NamedTemporaryFile(delete=False, suffix=".json")
-            daily_summary.to_json(tmp_fil, orient="split")
-            tmp_fil.close()
-            request.session["cleaned_daily"] = tmp_fil.name
-
-            # Generate HTML tables with Bootstrap classes
-            daily_table_html = daily_summary.to_html(
-                classes="table table-striped table-bordered table-hover",
-                index=False,
-                border=0
-            )
-            totals_table_html = staff_totals.to_html(
-                classes="table table-striped table-bordered table-hover",
-                index=False,
-                border=0
-            )
-
+            # Bursts of uploads wait here for a slot; blocking work runs on the view pool
+            async with upload_slot():
+                # Parsing the multipart body streams the upload to disk, hashing and
+                # checking it on the way (uploads.py); bad files are dropped early
+                request.upload_handlers = [WorkbookUploadHandler(request)]
+                files = await run_blocking(getattr, request, "FILES")
+                forbidden = await run_blocking(_csrf_failure, request)
+                if forbidden is not None:
+                    return forbidden
+                month_id = request.POST.get("month_id") or timezone.now().strftime("%Y-%m")
+                _check_month(month_id)
+
+                new_record = files.get("my_record")
+                if new_record is None:
+                    raise ValueError(request.upload_errors.get("my_record", "No file was uploaded."))
+                digest = cache_key(new_record.sha256, month_id, workbook=not new_record.punch_log)
+                cached = await run_blocking(lookup, digest)
+                if cached is not None:
+                    # Same workbook as an earlier upload: reuse its results, no Excel parsing
+                    await run_blocking(copy_result, cached.attendance, month_id)
+                    await request.session.aset("month_id", month_id)
+                    await request.session.aset("show_month", month_id)
+                else:
+                    # Queue the uploaded Excel file; parsing happens in the background
+                    if request.session.session_key is None:
+                        await request.session.asave()
+                    job = await run_blocking(
+                        enqueue_upload, new_record, month_id, digest, request.session.session_key
+                    )
+                    await request.session.aset("upload_job", job.pk)
         except Exception as e:
             error_message = f"An error occurred while processing the files: {str(e)}"
+            if "application/json" in request.headers.get("Accept", ""):
+                return JsonResponse({"error": str(e)}, status=400)
+        else:
+            if "application/json" in request.headers.get("Accept", ""):
+                if job is None:
+                    return JsonResponse({"job_id": None, "cached": True, "month_id": month_id})
+                status_url = reverse("upload_status", args=[job.pk])
+                return JsonResponse({"job_id": job.pk, "status_url": status_url}, status=202)
+            return redirect("dashboard")
+    else:
+        show_month = await request.session.apop("show_month", None)
+        job_id = await request.session.aget("upload_job")
+        if job_id:
+            job = await UploadJob.objects.filter(pk=job_id).afirst()
+            if job is not None:
+                job = await run_blocking(recover_job, job)
+
+        if job and job.status == UploadJob.STATUS_DONE:
+            await request.session.apop("upload_job")
+            await request.session.aset("month_id", job.month_id)
+            show_month = job.month_id
+        elif job and job.status == UploadJob.STATUS_FAILED:
+            await request.session.apop("upload_job")
+            error_message = f"An error occurred while processing the files: {job.error}"
+
+        if show_month:
+            daily_table_html, totals_table_html = await run_blocking(_summary_tables, show_month)
 
     # Render template with tables
-    return render(
+    return await run_blocking(
+        render,
         request,
         'temp/dashboard.html',
         {
             'daily_table_html': daily_table_html,
             'totals_table_html': totals_table_html,
-            'error': error_message
+            'error': error_message,
+            'job': job if job and not job.finished else None,
+            'month_id': timezone.now().strftime("%Y-%m"),
         }
     )
 
 
-def daily(request):
-    report_json = request.session.get("cleaned_daily")
+def upload_status(request, job_id):
+    # Only the session that queued the job may poll it
+    if request.session.get("upload_job") != job_id:
+        return JsonResponse({"error": "Unknown job."}, status=404)
+    job = UploadJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({"error": "Unknown job."}, status=404)
+    job = recover_job(job)
+    return JsonResponse({
+        "job_id": job.pk,
+        "status": job.status,
+        "progress": job.progress,
+        "error": job.error,
+        "finished": job.finished,
+    })
+
+
+def _report_page(month_id, which, params, filter_day=False):
+    """(table_html, table_state) for one page of a stored report, or None without one."""
+    result = get_result(month_id) if month_id else None
+    if result is None:
+        return None
+
+    # Repeat views of the same page are served from the fragment cache
+    page_params = [(key, params[key]) for key in REPORT_PAGE_PARAMS if params.get(key)]
+    return cached_fragment(
+        result, f"{which}_page", page_params, lambda: _render_report_page(result, which, params, filter_day)
+    )
 
-    if not report_json:
-        return render(request, "temp/daily.html", {
-            "message": "No results available. Please upload files."
-        })
 
-    from io import StringIO
-    import os
-    try:
-        if isinstance(report_json, str) and os.path.exists(report_json):
-            report = pd.read_json(report_json, orient="split")
-        else:
-            report = pd.read_json(StringIO(report_json), orient="split")
-    except Exception as e:
-        print(f"Error loading B daily report: {e}")
-        return render(request, "temp/daily.html", {"message": f"Error loading report: {e}"})
+def _render_report_page(result, which, params, filter_day):
+    with metrics.stage("load_report"):
+        report = load_frame(result, which)
 
-    print("DEBUG: Report shape =", report.shape)
+    logger.debug("Report loaded", extra={"month_id": result.month_id, "rows": len(report)})
 
-    
+    # Only the requested page is rendered
+    rows, table = page_report(report, params, filter_day=filter_day)
+    with metrics.stage("to_html"):
+        table_html = rows.to_html(classes="table table-bordered", index=False)
+    return table_html, table
 
-    table_html = report.to_html(classes="table table-bordered", index=False)
-    return render(request, "temp/daily.html", {"table": table_html})
 
-def monthly(request):
-    report_json = request.session.get("cleaned_totals")
+async def daily(request):
+    from .punches import WEEKDAY_CYCLE  # NumPy; loaded with the first report anyway
 
-    if not report_json:
-        return render(request, "temp/monthly.html", {
+    month_id = await _arequested_month(request)
+    page = await run_blocking(_report_page, month_id, "daily", request.GET, filter_day=True)
+
+    if page is None:
+        return await run_blocking(render, request, "temp/daily.html", {
             "message": "No results available. Please upload files."
         })
 
-    from io import StringIO
-    import os
-    try:
-        if isinstance(report_json, str) and os.path.exists(report_json):
-            report = pd.read_json(report_json, orient="split")
-        else:
-            report = pd.read_json(StringIO(report_json), orient="split")
-    except Exception as e:
-        print(f"Error loading B monthly report: {e}")
-        return render(request, "temp/monthly.html", {"message": f"Error loading report: {e}"})
+    table_html, table = page
+    return await run_blocking(render, request, "temp/daily.html", {
+        "table": table_html,
+        "table_state": table,
+        "month_id": month_id,
+        "weekdays": WEEKDAY_CYCLE,
+    })
 
-    print("DEBUG: Report shape =", report.shape)
+async def monthly(request):
+    month_id = await _arequested_month(request)
+    page = await run_blocking(_report_page, month_id, "totals", request.GET)
 
-    
+    if page is None:
+        return await run_blocking(render, request, "temp/monthly.html", {
+            "message": "No results available. Please upload files."
+        })
 
-    table_html = report.to_html(classes="table table-bordered", index=False)
-    return render(request, "temp/monthly.html", {"table": table_html})
+    table_html, table = page
+    return await run_blocking(render, request, "temp/monthly.html", {
+        "table": table_html,
+        "table_state": table,
+        "month_id": month_id,
+    })
+
+def analytics(request):
+    month_id = _requested_month(request)
+    result = get_result(month_id) if month_id else None
+    if result is None:
+        return render(request, "temp/analytics.html", {
+            "error": "No results available. Please upload files."
+        })
 
-def download_results(request):
-    report_json = request.session.get("cleaned_daily")
-    print ("DEBUG: Retrieved report_json from session:", report_json)
+    rollups = load_rollups(result)
+    day_totals = rollups.weekday_resume()
 
-    if not report_json:
-        return HttpResponse("No results to download.", status=400)
-    from io import StringIO
-    import os
-            
     try:
-        if isinstance(report_json, str) and os.path.exists(report_json):
-            report = pd.read_json(report_json, orient="split")
-        else:
-            report = pd.read_json(StringIO(report_json), orient="split")
-    except Exception as e:
-        print(f"Error loading B monthly report: {e}")
-        return render(request, "temp/monthly.html", {"message": f"Error loading report: {e}"})
-
-    # Save to in-memory buffer
-    buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-        report.to_excel(writer, index=False, sheet_name="Daily Attendance Report")
-    buffer.seek(0)
-
-    # Send as downloadable response
-    response = HttpResponse(
-        buffer,
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    response["Content-Disposition"] = 'attachment; filename="Daily_attendance_report.xlsx"'
+        charts = get_charts(result)
+        chart_error = None
+    except RuntimeError as e:
+        charts, chart_error = None, str(e)
+
+    return render(request, "temp/analytics.html", {
+        "month_id": month_id,
+        "total_staff": rollups.staff_count,
+        "best_day": day_totals.idxmax() if len(day_totals) else "-",
+        "lowest_day": day_totals.idxmin() if len(day_totals) else "-",
+        "charts": charts,
+        "chart_error": chart_error,
+    })
+
+def analytics_charts(request):
+    month_id = _requested_month(request)
+    result = get_result(month_id) if month_id else None
+    if result is None:
+        return JsonResponse({"error": "No results available."}, status=404)
+    try:
+        charts = get_charts(result)
+    except RuntimeError as e:
+        return JsonResponse({"status": "failed", "error": str(e)})
+    if charts is None:
+        return JsonResponse({"status": "pending"})
+    return JsonResponse({"status": "ready", "charts": charts})
+
+async def _download(request, which, sheet_name, filename):
+    month_id = await _arequested_month(request)
+    result = await run_blocking(get_result, month_id) if month_id else None
+    logger.debug("Download requested", extra={"month_id": month_id, "which": which})
+
+    if result is None:
+        return HttpResponse("No results to download.", status=400)
+
+    # ?format=csv streams rows as they are produced
+    if request.GET.get("format") == "csv":
+        response = StreamingHttpResponse(aiter_blocking(iter_csv(result, which)), content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+        return response
+
+    # The XLSX is built once per stored result and then streamed from disk
+    path = await run_blocking(xlsx_artifact, result, which, sheet_name)
+    response = StreamingHttpResponse(aiter_file(path), content_type=XLSX_CONTENT_TYPE)
+    response["Content-Length"] = os.path.getsize(path)
+    response["Content-Disposition"] = f'attachment; filename="{filename}.xlsx"'
     return response
 
-def download_monthly_results(request):
-    report_json = request.session.get("cleaned_totals")
-    print ("DEBUG: Retrieved report_json from session:", report_json)
+async def download_results(request):
+    return await _download(request, "daily", "Daily Attendance Report", "Daily_attendance_report")
+
+async def download_monthly_results(request):
+    return await _download(request, "totals", "Monthly Attendance Report", "Montly_attendance_report")
+
+# ----------------------------
+#  Cross-month queries (AttendanceFact table)
+# ----------------------------
+def _month_range(request):
+    start, end = request.GET.get("from") or None, request.GET.get("to") or None
+    for month_id in (start, end):
+        if month_id:
+            _check_month(month_id)
+    return start, end
+
+def staff_trend(request):
+    staff = request.GET.get("staff", "").strip()
+    if not staff:
+        return JsonResponse({"error": "The staff parameter is required."}, status=400)
+    try:
+        start, end = _month_range(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return JsonResponse({"staff": staff, "months": facts.staff_trend(staff, start, end)})
 
-    if not report_json:
-        return HttpResponse("No results to download.", status=400)
-    from io import StringIO
-    import os
-            
+def monthly_trend(request):
     try:
-        if isinstance(report_json, str) and os.path.exists(report_json):
-            report = pd.read_json(report_json, orient="split")
-        else:
-            report = pd.read_json(StringIO(report_json), orient="split")
-    except Exception as e:
-        print(f"Error loading B monthly report: {e}")
-        return render(request, "temp/monthly.html", {"message": f"Error loading report: {e}"})
-
-    # Save to in-memory buffer
-    buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-        report.to_excel(writer, index=False, sheet_name="Monthly Attendance Report")
-    buffer.seek(0)
-
-    # Send as downloadable response
-    response = HttpResponse(
-        buffer,
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    response["Content-Disposition"] = 'attachment; filename="Montly_attendance_report.xlsx"'
-    return response
\ No newline at end of file
+        start, end = _month_range(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return JsonResponse({"months": facts.monthly_summary(start, end)})
+
+def year_over_year(request):
+    staff = request.GET.get("staff", "").strip() or None
+    return JsonResponse({"staff": staff, "rows": facts.year_over_year(staff)})
+
+def metrics_view(request):
+    # Prometheus scrape endpoint: per-stage histograms of this process
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
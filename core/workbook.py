@@ -0,0 +1,166 @@
+import posixpath
+import zipfile
+from xml.etree import ElementTree
+
+# Layout of the device export, counted in data rows (the header row excluded),
+# i.e. the rows new_attendance and the dashboard's `number > 3` filter throw away.
+LOGS_SKIP_ROWS = 4      # df['number'] > 4 in new_attendance
+LOGS_ROW_STEP = 3       # every 3rd row carries the punches
+SUMMARY_SKIP_ROWS = 3   # df_names['number'] > 3 in dashboard
+SUMMARY_NAME_COL = 1    # the 'Unnamed: 1' column
+DAY_COUNT = 32
+
+ZIP_MAGIC = b"PK\x03\x04"
+REQUIRED_SHEETS = ("Logs", "Summary")
+WORKBOOK_PART = "xl/workbook.xml"
+WORKBOOK_RELS_PART = "xl/_rels/workbook.xml.rels"
+MAX_PART_BYTES = 1024 * 1024  # workbook.xml and its rels are a few KB
+# openpyxl/pandas are imported by the loaders only: the upload checks below
+# run in the web process and need nothing but zipfile.
+
+
+def _is_blank(value):
+    return value is None or value == ""
+
+
+def _trim(row):
+    """Drops trailing empty cells, like pandas does for every sheet row."""
+    end = len(row)
+    while end and _is_blank(row[end - 1]):
+        end -= 1
+    return row[:end]
+
+
+def iter_sheet_rows(ws, skip, step=1, shape=None):
+    """
+    Streams the data rows of a read-only worksheet as compact tuples.
+    Skips the header row plus `skip` data rows, then yields every `step`-th
+    row. Trailing empty rows are dropped, as read_excel does. If `shape` is a
+    dict, shape["width"] is set to the widest row of the sheet.
+    """
+    ws.reset_dimensions()
+    width = 0
+    pending = []   # blank rows, only kept if data follows them
+    position = -1  # data row index, header excluded
+    for row_number, row in enumerate(ws.iter_rows(values_only=True)):
+        row = _trim(row)
+        width = max(width, len(row))
+        if row_number == 0:
+            continue
+        position += 1
+        keep = position >= skip and (position - skip) % step == 0
+        if not row:
+            if keep:
+                pending.append(row)
+            continue
+        yield from pending
+        pending.clear()
+        if keep:
+            yield row
+    if shape is not None:
+        shape["width"] = width
+
+
+def records_to_frame(records, width):
+    """
+    Builds the DAY1..DAY32 frame new_attendance would have produced.
+    DAY columns present in the sheet but empty for every staff row are
+    dropped; DAY columns beyond the sheet width are filled with "".
+    """
+    import numpy as np
+    import pandas as pd
+
+    columns = [f"DAY{i}" for i in range(1, DAY_COUNT + 1)]
+    sheet_cols = min(width, DAY_COUNT)
+    frame = pd.DataFrame.from_records(
+        [row[:sheet_cols] + (None,) * (sheet_cols - len(row)) for row in records],
+        columns=columns[:sheet_cols],
+    ) if records else pd.DataFrame(columns=columns[:sheet_cols], dtype=object)
+    frame = frame.astype(object)
+    frame = frame.where(frame.notna() & frame.ne(""), np.nan)
+    for col in columns[sheet_cols:]:
+        frame[col] = ""
+    return frame.dropna(axis=1, how="all")
+
+
+def load_attendance_workbook(upload):
+    """
+    Single-pass replacement for the two pd.read_excel calls + new_attendance.
+    Opens the workbook once in read-only mode, streams "Logs" and "Summary",
+    and returns (cleaned_df, staff_names) ready for extract_attendance_times.
+    """
+    import numpy as np
+    import openpyxl
+    import pandas as pd
+
+    wb = openpyxl.load_workbook(upload, read_only=True, data_only=True, keep_links=False)
+    try:
+        shape = {}
+        records = list(iter_sheet_rows(wb["Logs"], LOGS_SKIP_ROWS, LOGS_ROW_STEP, shape))
+        names = [
+            row[SUMMARY_NAME_COL] if len(row) > SUMMARY_NAME_COL else None
+            for row in iter_sheet_rows(wb["Summary"], SUMMARY_SKIP_ROWS)
+        ]
+    finally:
+        wb.close()
+
+    staff_names = pd.Series([np.nan if _is_blank(name) else name for name in names], dtype=object)
+    return records_to_frame(records, shape["width"]), staff_names
+
+
+def is_workbook(path):
+    """True for an .xlsx (zip) file, False for anything else, e.g. a CSV punch log."""
+    with open(path, "rb") as f:
+        return f.read(len(ZIP_MAGIC)) == ZIP_MAGIC
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _read_xml(archive, name):
+    if archive.getinfo(name).file_size > MAX_PART_BYTES:
+        raise ValueError("The workbook structure is unexpectedly large.")
+    return ElementTree.fromstring(archive.read(name))
+
+
+def check_workbook(f):
+    """
+    Cheap structural check of an .xlsx upload before any full parse: reads
+    the zip directory and the small workbook part only. Raises ValueError
+    unless the file is a workbook with "Logs" and "Summary" worksheets.
+    """
+    try:
+        with zipfile.ZipFile(f) as archive:
+            names = set(archive.namelist())
+            if WORKBOOK_PART not in names:
+                raise ValueError("The file is not an Excel workbook (.xlsx).")
+            sheets = {
+                sheet.get("name"): next((v for k, v in sheet.attrib.items() if _local(k) == "id"), None)
+                for sheet in _read_xml(archive, WORKBOOK_PART).iter()
+                if _local(sheet.tag) == "sheet"
+            }
+            missing = [name for name in REQUIRED_SHEETS if name not in sheets]
+            if missing:
+                found = ", ".join(repr(name) for name in sheets) or "none"
+                raise ValueError(
+                    f"The workbook has no {' / '.join(repr(name) for name in missing)} sheet (sheets found: {found})."
+                )
+
+            # The declared sheets must point at worksheet parts that are really there
+            targets = {}
+            if WORKBOOK_RELS_PART in names:
+                targets = {
+                    rel.get("Id"): rel.get("Target", "")
+                    for rel in _read_xml(archive, WORKBOOK_RELS_PART).iter()
+                    if _local(rel.tag) == "Relationship"
+                }
+            for name in REQUIRED_SHEETS:
+                target = targets.get(sheets[name], "")
+                part = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+                if part not in names:
+                    raise ValueError(f"The workbook's '{name}' sheet is missing or damaged.")
+    except (zipfile.BadZipFile, ElementTree.ParseError, KeyError):
+        raise ValueError("The file is not a valid Excel workbook (.xlsx).")
+    finally:
+        f.seek(0)
@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 """Django's command-line utility for administrative tasks."""
+import multiprocessing
 import os
 import sys
 
@@ -19,4 +20,6 @@ def main():
 
 
 if __name__ == '__main__':
+    # Upload worker processes re-enter here in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     main()
@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'rest_framework',
     'core',
 ]
 
@@ -76,13 +77,37 @@ WSGI_APPLICATION = 'provost_soft.wsgi.application'
 # ---------------------------
 # Database
 # ---------------------------
+# SQLite shared by request threads, upload jobs and management commands
+# (core/db.py): WAL so reads never wait for a write, transactions that take the
+# write lock up front and wait up to `timeout` seconds for it, and connections
+# kept open across requests.
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',  # Path object supports /
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),  # seconds
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,  # seconds, SQLite busy timeout
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA temp_store=MEMORY;'
+                'PRAGMA cache_size=-20000;'  # KiB
+                'PRAGMA mmap_size=134217728;'
+            ),
+        },
     }
 }
 
+# Writes that still find the database locked are retried this many times,
+# backing off from DB_RETRY_DELAY seconds; stored results are committed by one
+# writer thread per process, up to DB_WRITE_BATCH pending ones per transaction
+DB_WRITE_RETRIES = 5
+DB_RETRY_DELAY = 0.1
+DB_WRITE_BATCH = 16
+
 # ---------------------------
 # Password validation
 # ---------------------------
@@ -107,6 +132,81 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'static'
 
+# ---------------------------
+# Upload processing
+# ---------------------------
+# Worker processes parsing uploaded workbooks in the background
+UPLOAD_WORKERS = int(os.environ.get('UPLOAD_WORKERS', min(4, os.cpu_count() or 1)))
+
+# Large rosters are parsed in row shards of at least AGGREGATE_SHARD_ROWS
+# staff, by up to AGGREGATE_WORKERS processes (core/shards.py)
+AGGREGATE_WORKERS = int(os.environ.get('AGGREGATE_WORKERS', os.cpu_count() or 1))
+AGGREGATE_SHARD_ROWS = 2500
+
+# Upload jobs neither finished nor updated for this long are failed; the
+# process that ran them is gone (jobs.recover_job)
+UPLOAD_JOB_TIMEOUT = 30 * 60  # seconds
+
+# Largest accepted workbook upload
+UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', 25 * 1024 * 1024))
+
+# Async views: threads for their blocking work, and uploads handled at once
+VIEW_WORKERS = int(os.environ.get('VIEW_WORKERS', 8))
+UPLOAD_CONCURRENCY = int(os.environ.get('UPLOAD_CONCURRENCY', 2))
+
+# Re-uploads of an identical workbook are served from earlier results
+UPLOAD_CACHE_MAX_ENTRIES = 200
+UPLOAD_CACHE_MAX_AGE = 30 * 24 * 60 * 60  # seconds
+
+# Exports, charts and stored uploads (core/artifacts.py): evicted after this
+# long unused, least recently used first beyond the size cap
+ARTIFACT_MAX_AGE = int(os.environ.get('ARTIFACT_MAX_AGE', 7 * 24 * 60 * 60))  # seconds
+ARTIFACT_MAX_BYTES = int(os.environ.get('ARTIFACT_MAX_BYTES', 2 * 1024 ** 3))
+ARTIFACT_SWEEP_INTERVAL = 15 * 60  # seconds
+
+# ---------------------------
+# Cache
+# ---------------------------
+# Rendered report fragments (core/fragments.py). Per process; point this at a
+# shared backend (e.g. Redis) when running several server processes.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'provost-fragments',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+}
+
+# ---------------------------
+# JSON API (core/api.py)
+# ---------------------------
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+}
+
+# ---------------------------
+# Logging
+# ---------------------------
+# One JSON object per line, with the fields passed as `extra=` (core/log.py)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'core.log.JsonFormatter'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'json'},
+    },
+    'loggers': {
+        'core': {
+            'handlers': ['console'],
+            'level': os.environ.get('LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # ---------------------------
 # Default primary key field type
 # ---------------------------